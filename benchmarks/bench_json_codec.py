@@ -0,0 +1,126 @@
+"""Compare the stdlib and orjson backends of `shopify_theme_utils.json_codec`.
+
+Usage:
+  poetry run python benchmarks/bench_json_codec.py
+  poetry run python benchmarks/bench_json_codec.py --rows 50000 --templates 500
+
+Workloads mirror the hot paths: JSON templates (indent=2, comment header on
+read, settings with hex colors and em sizes) and `csv_to_json` catalogs
+(indent=4), plus templates holding an exponent-form float to show the cost of
+the stdlib fallback. Every orjson result is checked to
+be byte-identical to the stdlib one before timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from shopify_theme_utils import json_codec
+from shopify_theme_utils.theme_tree import _LEADING_BLOCK_COMMENT_RE, parse_template_text
+
+
+def _template(i: int) -> dict:
+    return {
+        "sections": {
+            f"section-{s}": {
+                "type": "main-product" if s == 0 else "rich-text",
+                "blocks": {
+                    f"block-{b}": {
+                        "type": "collapsible_tab",
+                        "settings": {"heading": f"Tab {b} — détails", "content": "<p>lorem ipsum</p>" * 5, "open": b == 0},
+                    }
+                    for b in range(12)
+                },
+                "block_order": [f"block-{b}" for b in range(12)],
+                "settings": {
+                    "padding_top": 36,
+                    "ratio": 1.5,
+                    "image_ratio": 0.75,
+                    "color_scheme": f"scheme-{i % 4}",
+                    # Real settings are full of digit+e strings (hex colors, em sizes);
+                    # they must not push the encoder onto its stdlib fallback.
+                    "background": "#1e1e1e",
+                    "accent": "#e5e5e5",
+                    "heading_size": "2em",
+                    "letter_spacing": "0.1em",
+                    "gradient": "linear-gradient(180deg, #1e1e1e 0%, #3e3e3e 100%)",
+                },
+            }
+            for s in range(8)
+        },
+        "order": [f"section-{s}" for s in range(8)],
+    }
+
+
+def _catalog(rows: int) -> dict:
+    return {
+        f"SKU-{i:06d}": {
+            "sku": f"SKU-{i:06d}",
+            "title": f"Product {i} – édition limitée",
+            "price": f"{(i % 500) + 0.99:.2f}",
+            "description": "Soft organic cotton, relaxed fit. " * 4,
+        }
+        for i in range(rows)
+    }
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000, help="catalog rows")
+    parser.add_argument("--templates", type=int, default=200, help="number of templates")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if json_codec.orjson is None:
+        print("orjson is not installed; install it to compare backends (pip install orjson).")
+        return
+
+    templates = [_template(i) for i in range(args.templates)]
+    # A float repr() writes with an exponent forces the stdlib fallback for the whole dump.
+    fallback_templates = [{**t, "opacity": 1e-05} for t in templates]
+    template_texts = ["/* header */\n" + json.dumps(t, indent=2) + "\n" for t in templates]
+    catalog = _catalog(args.rows)
+
+    for t in templates[:5] + fallback_templates[:5]:
+        assert json_codec.dumps(t, indent=2, backend="orjson") == json.dumps(t, indent=2)
+    assert json_codec.dumps(catalog, indent=4, backend="orjson") == json.dumps(catalog, indent=4)
+
+    workloads = {
+        "templates dumps (indent=2)": (
+            lambda: [json.dumps(t, indent=2) for t in templates],
+            lambda: [json_codec.dumps(t, indent=2) for t in templates],
+        ),
+        "templates dumps, stdlib fallback": (
+            lambda: [json.dumps(t, indent=2) for t in fallback_templates],
+            lambda: [json_codec.dumps(t, indent=2) for t in fallback_templates],
+        ),
+        "templates parse": (
+            lambda: [json.loads(_LEADING_BLOCK_COMMENT_RE.sub("", t, count=1)) for t in template_texts],
+            lambda: [parse_template_text(t) for t in template_texts],
+        ),
+        "catalog dumps (indent=4)": (
+            lambda: json.dumps(catalog, indent=4),
+            lambda: json_codec.dumps(catalog, indent=4),
+        ),
+    }
+
+    print(f"{'workload':<34} {'stdlib':>10} {'orjson':>10} {'speedup':>8}")
+    for name, (stdlib_fn, codec_fn) in workloads.items():
+        t_std = _best_of(stdlib_fn, args.repeat)
+        t_fast = _best_of(codec_fn, args.repeat)
+        print(f"{name:<34} {t_std * 1000:>8.1f}ms {t_fast * 1000:>8.1f}ms {t_std / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
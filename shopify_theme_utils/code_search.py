@@ -0,0 +1,251 @@
+"""Incremental full-text index over theme source files.
+
+`CodeSearchIndex` stores Liquid, JSON and JS files from `theme_files` and
+every backup under `previous-themes/` in a SQLite FTS5 table with the
+`trigram` tokenizer, so substring queries (a snippet name, an app embed
+handle, `| money_with_currency`) are answered from the index instead of
+re-reading every theme:
+
+    runner.update_code_index()
+    runner.search_code("render 'product-badge'")
+
+`update()` only re-reads files whose size/mtime changed and only rewrites
+index rows whose sha256 changed; files and themes that disappeared are
+dropped. Queries shorter than three characters can't use trigrams and fall
+back to a full scan of the indexed text.
+
+Needs SQLite 3.34+ (FTS5 trigram tokenizer), which ships with current Python
+builds. A connection must be used from the thread that opened it.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from shopify_theme_utils.theme_tree import ThemeTree
+
+CODE_INDEX_NAME = ".shopify-theme-utils-code-index.sqlite"
+SCHEMA_VERSION = 1
+INDEXED_SUFFIXES = (".liquid", ".json", ".js")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS themes (
+    theme TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    theme_id TEXT,
+    store TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    theme TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    UNIQUE (theme, path)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS file_text USING fts5(body, tokenize = 'trigram');
+"""
+
+
+def _indexed(rel: str) -> bool:
+    return rel.endswith(INDEXED_SUFFIXES) and not any(part.startswith(".") for part in rel.split("/"))
+
+
+def _read_candidate(tree: ThemeTree, rel: str) -> tuple[str, str, str] | None:
+    try:
+        return rel, tree.digest(rel), tree.read_text(rel)
+    except OSError:
+        return None
+
+
+class CodeSearchIndex:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.row_factory = sqlite3.Row
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{self.path} has code index schema {version}, expected {SCHEMA_VERSION}")
+        try:
+            with self._conn:
+                self._conn.executescript(_SCHEMA)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} lacks the FTS5 trigram tokenizer (needs 3.34+): {e}"
+            ) from e
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CodeSearchIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def update(
+        self,
+        themes: dict[str, dict[str, Any]],
+        *,
+        prune: bool | Callable[[str], bool] = True,
+        max_workers: int = 8,
+    ) -> dict[str, int]:
+        """Bring the index in line with the files on disk.
+
+        Args:
+            themes: theme label -> {"root": dir, "theme_id": ..., "store": ...}.
+            prune: Drop indexed themes that aren't in `themes`. A callable
+                limits this to the theme labels it returns True for, so a
+                partial refresh leaves other themes in the index.
+            max_workers: Threads used to read and hash changed files.
+
+        Returns:
+            Counts of indexed/unchanged/removed files and removed themes.
+        """
+        counts = {"indexed": 0, "unchanged": 0, "removed": 0, "removed_themes": 0}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for theme, info in themes.items():
+                self._update_theme(theme, info, pool, counts)
+
+        if prune:
+            stale = [
+                r["theme"]
+                for r in self._conn.execute("SELECT theme FROM themes")
+                if r["theme"] not in themes and (prune is True or prune(r["theme"]))
+            ]
+            with self._conn:
+                for theme in stale:
+                    self._conn.execute(
+                        "DELETE FROM file_text WHERE rowid IN (SELECT id FROM files WHERE theme = ?)", (theme,)
+                    )
+                    counts["removed"] += self._conn.execute("DELETE FROM files WHERE theme = ?", (theme,)).rowcount
+                    self._conn.execute("DELETE FROM themes WHERE theme = ?", (theme,))
+            counts["removed_themes"] = len(stale)
+        return counts
+
+    def _update_theme(self, theme: str, info: dict[str, Any], pool: ThreadPoolExecutor, counts: dict[str, int]) -> None:
+        tree = ThemeTree(info["root"])
+        known = {
+            r["path"]: (r["id"], r["size"], r["mtime_ns"], r["sha256"])
+            for r in self._conn.execute("SELECT id, path, size, mtime_ns, sha256 FROM files WHERE theme = ?", (theme,))
+        }
+        present = [rel for rel in tree.files("", recursive=True) if _indexed(rel)]
+
+        candidates = []
+        for rel in present:
+            old = known.get(rel)
+            size, mtime_ns = tree.stat(rel)
+            # Same stat as indexed, and not modified during/after the tree scan.
+            if old is not None and old[1:3] == (size, mtime_ns) and mtime_ns < tree.scanned_ns:
+                counts["unchanged"] += 1
+            else:
+                candidates.append(rel)
+
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO themes (theme, root, theme_id, store) VALUES (?, ?, ?, ?)",
+                (theme, str(info["root"]), info.get("theme_id"), info.get("store")),
+            )
+            for read in pool.map(lambda rel: _read_candidate(tree, rel), candidates):
+                if read is None:
+                    continue
+                rel, sha, text = read
+                size, mtime_ns = tree.stat(rel)
+                old = known.get(rel)
+                if old is not None and old[3] == sha:
+                    self._conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (size, mtime_ns, old[0]))
+                    counts["unchanged"] += 1
+                    continue
+                if old is not None:
+                    self._conn.execute("DELETE FROM file_text WHERE rowid = ?", (old[0],))
+                    self._conn.execute(
+                        "UPDATE files SET size = ?, mtime_ns = ?, sha256 = ? WHERE id = ?", (size, mtime_ns, sha, old[0])
+                    )
+                    file_id = old[0]
+                else:
+                    file_id = self._conn.execute(
+                        "INSERT INTO files (theme, path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                        (theme, rel, size, mtime_ns, sha),
+                    ).lastrowid
+                self._conn.execute("INSERT INTO file_text (rowid, body) VALUES (?, ?)", (file_id, text))
+                counts["indexed"] += 1
+
+            gone = [known[rel][0] for rel in set(known) - set(present)]
+            self._conn.executemany("DELETE FROM file_text WHERE rowid = ?", [(i,) for i in gone])
+            self._conn.executemany("DELETE FROM files WHERE id = ?", [(i,) for i in gone])
+            counts["removed"] += len(gone)
+
+    def themes(self) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT t.*, (SELECT COUNT(*) FROM files f WHERE f.theme = t.theme) AS files FROM themes t ORDER BY t.theme"
+        )
+        return [dict(r) for r in rows]
+
+    def search(
+        self,
+        query: str,
+        *,
+        theme: str | None = None,
+        path_glob: str | None = None,
+        case_sensitive: bool = False,
+        limit: int | None = 200,
+    ) -> list[dict[str, Any]]:
+        """Find lines containing `query` (a literal substring).
+
+        Args:
+            query: Text to look for.
+            theme: Only search this theme label (e.g. "theme_files").
+            path_glob: Only search paths matching this glob (e.g. "sections/*").
+            case_sensitive: Match case exactly (the index itself is case-insensitive).
+            limit: Maximum number of hits (None for all).
+
+        Returns:
+            Hits ordered by theme/path/line, each with theme, theme_id, store,
+            path, line (1-based) and the line's text.
+        """
+        if not query:
+            raise ValueError("query must not be empty")
+        where, params = [], []
+        if len(query) >= 3:
+            where.append("file_text MATCH ?")
+            params.append('"' + query.replace('"', '""') + '"')
+        else:
+            where.append("instr(lower(file_text.body), ?) > 0")
+            params.append(query.lower())
+        if theme is not None:
+            where.append("f.theme = ?")
+            params.append(theme)
+        sql = (
+            "SELECT f.theme, t.theme_id, t.store, f.path, file_text.body FROM file_text "
+            "JOIN files f ON f.id = file_text.rowid JOIN themes t ON t.theme = f.theme "
+            f"WHERE {' AND '.join(where)} ORDER BY f.theme, f.path"
+        )
+
+        needle = query if case_sensitive else query.casefold()
+        hits: list[dict[str, Any]] = []
+        for row in self._conn.execute(sql, params):
+            if path_glob is not None and not fnmatch.fnmatchcase(row["path"], path_glob):
+                continue
+            for lineno, line in enumerate(row["body"].splitlines(), 1):
+                if needle in (line if case_sensitive else line.casefold()):
+                    hits.append(
+                        {
+                            "theme": row["theme"],
+                            "theme_id": row["theme_id"],
+                            "store": row["store"],
+                            "path": row["path"],
+                            "line": lineno,
+                            "text": line.strip(),
+                        }
+                    )
+                    if limit is not None and len(hits) >= limit:
+                        return hits
+        return hits
@@ -0,0 +1,119 @@
+"""Split `csv_to_json` output into size-bounded JSON shards plus a lookup index.
+
+Two strategies are supported:
+
+  - "hash": shard = fnv1a32(key as UTF-8) % shard_count. The storefront only
+    needs the shard count from the index; FNV-1a is a few lines of JS.
+  - "range": keys are sorted and packed greedily; the index lists the first and
+    last key of each shard so the storefront can binary-search it. Keys are
+    sorted by code point, which matches JS string comparison for BMP text.
+
+Shard sizes are computed exactly for `json_codec.dumps(shard, indent=4)` output so no
+shard exceeds the byte budget.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from shopify_theme_utils import json_codec
+
+INDEX_VERSION = 1
+SHARD_STRATEGIES = ("hash", "range")
+
+_FNV32_OFFSET = 0x811C9DC5
+_FNV32_PRIME = 0x01000193
+
+
+def fnv1a_32(key: str) -> int:
+    h = _FNV32_OFFSET
+    for b in key.encode("utf-8"):
+        h ^= b
+        h = (h * _FNV32_PRIME) & 0xFFFFFFFF
+    return h
+
+
+def _entry_size(key: str, row: Any) -> int:
+    # json.dumps({k: v}, indent=4) == "{\n" + entry + "\n}"
+    return len(json_codec.dumps({key: row}, indent=4).encode("utf-8")) - 4
+
+
+def _shard_size(entry_sizes: list[int]) -> int:
+    if not entry_sizes:
+        return 2  # "{}"
+    # "{\n" + ",\n".join(entries) + "\n}"
+    return 4 + sum(entry_sizes) + 2 * (len(entry_sizes) - 1)
+
+
+def shard_rows(
+    data: dict[str, Any],
+    max_bytes: int,
+    *,
+    strategy: str = "hash",
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Split `data` into shards whose serialized size is at most `max_bytes`.
+
+    Returns:
+        (shards, index) where `index` describes the layout without file names;
+        callers add those under `index["shards"]`.
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"strategy must be one of {SHARD_STRATEGIES}, got {strategy!r}")
+    if max_bytes <= 0:
+        raise ValueError("max_bytes must be positive")
+
+    sizes = {k: _entry_size(k, v) for k, v in data.items()}
+    too_big = [k for k, n in sizes.items() if _shard_size([n]) > max_bytes]
+    if too_big:
+        raise ValueError(f"row {too_big[0]!r} alone exceeds the shard budget of {max_bytes} bytes")
+
+    if strategy == "range":
+        shards: list[dict[str, Any]] = []
+        bounds: list[dict[str, str]] = []
+        current: dict[str, Any] = {}
+        current_sizes: list[int] = []
+        for k in sorted(data):
+            if current and _shard_size(current_sizes + [sizes[k]]) > max_bytes:
+                shards.append(current)
+                current, current_sizes = {}, []
+            current[k] = data[k]
+            current_sizes.append(sizes[k])
+        if current or not shards:
+            shards.append(current)
+        for shard in shards:
+            keys = list(shard)
+            bounds.append({"first": keys[0] if keys else "", "last": keys[-1] if keys else ""})
+        return shards, {"strategy": "range", "bounds": bounds}
+
+    total = _shard_size(list(sizes.values()))
+    count = max(1, math.ceil(total / max_bytes))
+    hashes = {k: fnv1a_32(k) for k in data}
+    while True:
+        buckets: list[list[int]] = [[] for _ in range(count)]
+        for k, h in hashes.items():
+            buckets[h % count].append(sizes[k])
+        if all(_shard_size(b) <= max_bytes for b in buckets):
+            break
+        # Uneven hashing overflowed a bucket; grow and retry. Only colliding
+        # hashes can keep a bucket over budget forever, so bail out eventually.
+        if count > 4 * len(data):
+            raise ValueError("could not fit hashed shards in the byte budget; try strategy='range'")
+        count += max(1, count // 4)
+
+    shards = [{} for _ in range(count)]
+    for k, v in data.items():
+        shards[hashes[k] % count][k] = v
+    return shards, {"strategy": "hash", "hash": "fnv1a32", "shard_count": count}
+
+
+def index_shard_files(index: Any) -> list[str]:
+    """Shard file names listed in a `<stem>-index.json` payload (either strategy)."""
+    if not isinstance(index, dict) or not isinstance(index.get("shards"), list):
+        return []
+    names = []
+    for entry in index["shards"]:
+        name = entry.get("file") if isinstance(entry, dict) else entry
+        if isinstance(name, str):
+            names.append(name)
+    return names
@@ -0,0 +1,144 @@
+"""JSON encode/decode used for templates, manifests and `csv_to_json` output.
+
+Uses orjson when it's installed (`pip install shopify-theme-utils[fast]`) and
+the stdlib `json` module otherwise. Output is byte-for-byte what
+`json.dumps(obj, indent=indent)` produces, so switching backends never
+rewrites files:
+
+  - orjson only supports 2-space indents; other indents are derived from its
+    output by rescaling leading whitespace (strings can't contain raw newlines).
+  - Non-ASCII characters and DEL are escaped as `\\uXXXX` like `ensure_ascii`
+    (surrogate pairs for characters outside the BMP).
+  - Objects holding floats where orjson and `repr()` disagree (exponent forms
+    such as `1e16` vs `1e+16`, values below 1e-4, and NaN/Infinity, which
+    orjson writes as `null`) are found by walking the object before encoding
+    and go to the stdlib encoder, as do ints beyond 64 bits, non-str keys and
+    other values orjson rejects. String contents never trigger a fallback.
+
+Decoding falls back to the stdlib on any orjson error, so error messages and
+positions (and acceptance of NaN/Infinity literals) match `json.loads`, and for
+input containing a run of 19+ digits, since orjson reads integers wider than
+64 bits as floats.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# Exact types skipped without further checks while walking an object.
+_SCALAR_TYPES = frozenset((str, int, bool, type(None)))
+# Digits are folded to "0" so one substring search finds any 19-digit run.
+_FOLD_DIGITS = bytes.maketrans(b"123456789", b"000000000")
+_WIDE_DIGIT_RUN = b"0" * 19
+_ASTRAL_ESCAPE_RE = re.compile(rb"\\U([0-9a-f]{8})")
+
+
+def _surrogate_pair(m: re.Match) -> bytes:
+    n = int(m.group(1), 16) - 0x10000
+    return b"\\u%04x\\u%04x" % (0xD800 | (n >> 10), 0xDC00 | (n & 0x3FF))
+
+
+def _floats_match_repr(obj: Any) -> bool:
+    """True if every float in `obj` is finite and written by orjson exactly as `repr()`.
+
+    orjson and `repr()` agree on shortest round-trip digits; they differ only
+    where `repr()` uses an exponent (`1e+16`, `1e-05`) and for NaN/Infinity.
+    """
+    if isinstance(obj, float):
+        return math.isfinite(obj) and "e" not in repr(obj)
+    if not isinstance(obj, (dict, list, tuple)):
+        return True
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        for v in o.values() if isinstance(o, dict) else o:
+            if type(v) in _SCALAR_TYPES:
+                continue
+            if isinstance(v, float):
+                if not math.isfinite(v) or "e" in repr(v):
+                    return False
+            elif isinstance(v, (dict, list, tuple)):
+                stack.append(v)
+    return True
+
+
+def _ensure_ascii(raw: bytes) -> bytes:
+    """Escape non-ASCII in UTF-8 JSON output the way `ensure_ascii=True` does.
+
+    `backslashreplace` does the heavy lifting in C; its `\\xHH` and `\\UHHHHHHHH`
+    forms are then rewritten to JSON `\\u` escapes. Escaped backslashes are
+    parked on a NUL marker first (raw NUL can't occur in JSON output) so an
+    existing `\\\\x..` in a string is never mistaken for one of ours.
+    """
+    out = raw.replace(b"\\\\", b"\0").decode("utf-8").encode("ascii", "backslashreplace")
+    out = out.replace(b"\\x", b"\\u00")
+    if b"\\U" in out:
+        out = _ASTRAL_ESCAPE_RE.sub(_surrogate_pair, out)
+    return out.replace(b"\0", b"\\\\")
+
+
+def _reindent(out: bytes, indent: int) -> bytes:
+    """Turn 2-space indented output into `indent`-space indented output.
+
+    JSON strings can't contain raw newlines or NUL, so every newline + spaces
+    run is structural. Levels are rewritten deepest-first through a NUL
+    marker, one C-level `bytes.replace` per nesting level.
+    """
+    depth = 0
+    while b"\n" + b"  " * (depth + 1) in out:
+        depth += 1
+    for level in range(depth, 0, -1):
+        out = out.replace(b"\n" + b"  " * level, b"\n" + b"\0" * level)
+    return out.replace(b"\0", b" " * indent)
+
+
+def loads(data: str | bytes) -> Any:
+    """Equivalent to `json.loads(data)`."""
+    if orjson is not None:
+        # orjson turns integers beyond 64 bits into floats; json keeps them exact.
+        # Any 19+ digit run (even inside a string) sends the input to the stdlib.
+        raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else bytes(data)
+        if _WIDE_DIGIT_RUN in raw.translate(_FOLD_DIGITS):
+            return json.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, indent: int | None = None, backend: str | None = None) -> str:
+    """Equivalent to `json.dumps(obj, indent=indent)`.
+
+    `backend` forces "json" or "orjson" (mainly for benchmarks); by default the
+    fastest available backend is used.
+    """
+    use_orjson = (backend or BACKEND) == "orjson"
+    if use_orjson and orjson is None:
+        raise ValueError("orjson backend requested but orjson isn't installed")
+    if not use_orjson or not indent or indent < 0:
+        return json.dumps(obj, indent=indent)
+
+    if not _floats_match_repr(obj):
+        return json.dumps(obj, indent=indent)
+    try:
+        raw = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    except TypeError:
+        return json.dumps(obj, indent=indent)
+    if not raw.isascii():
+        raw = _ensure_ascii(raw)
+    if b"\x7f" in raw:
+        raw = raw.replace(b"\x7f", b"\\u007f")
+    if indent != 2:
+        raw = _reindent(raw, indent)
+    return raw.decode("ascii")
@@ -0,0 +1,53 @@
+"""Helpers for the `.shopify-theme-utils.json` manifest written next to theme backups."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from shopify_theme_utils import json_codec
+
+MANIFEST_NAME = ".shopify-theme-utils.json"
+
+
+def read_manifest(theme_dir: str | Path) -> dict[str, Any] | None:
+    """Return the parsed manifest for `theme_dir`, or None if missing/unreadable."""
+    manifest_path = Path(theme_dir) / MANIFEST_NAME
+    try:
+        data = json_codec.loads(manifest_path.read_bytes())
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def iter_backup_dirs(root: str | Path) -> Iterator[tuple[Path, dict[str, Any]]]:
+    """Yield `(theme_dir, manifest)` for every manifest-tagged directory directly under `root`.
+
+    Hidden directories (e.g. the retention trash dir) are ignored.
+    """
+    root = Path(root)
+    try:
+        entries = sorted(os.scandir(root), key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+            continue
+        manifest = read_manifest(entry.path)
+        if manifest is not None:
+            yield Path(entry.path), manifest
+
+
+def parse_manifest_ts(value: Any) -> datetime | None:
+    """Parse an ISO timestamp stored in a manifest. Naive values are treated as UTC."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
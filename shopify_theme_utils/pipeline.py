@@ -0,0 +1,183 @@
+"""A small staged pipeline executor that overlaps network and CPU work.
+
+Each stage has its own bounded worker pool and a bounded input queue. Items
+move to the next stage as soon as they finish the previous one, so with stages
+pull -> clean -> push, theme B can be pulling while theme A is being cleaned
+and theme C is being pushed.
+
+Thread stages run `fn` directly in worker threads (use them for subprocess /
+network calls). Process stages ship each item to a `ProcessPoolExecutor`, so
+their `fn`, items and results must be picklable (module-level functions).
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable
+
+STAGE_KINDS = ("thread", "process")
+
+_DONE = object()
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Any], *, workers: int = 1, kind: str = "thread"):
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"kind must be one of {STAGE_KINDS}, got {kind!r}")
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.kind = kind
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: list[Stage],
+    *,
+    queue_size: int = 2,
+    label: Callable[[Any], str] = repr,
+    on_done: Callable[[str, Any], None] | None = None,
+) -> dict[str, Any]:
+    """Push `items` through `stages` and wait for all of them to finish.
+
+    Args:
+        items: Inputs for the first stage.
+        stages: Stages in order; each stage's return value feeds the next one.
+        queue_size: Per-stage input queue bound (backpressure between stages).
+        label: How to describe an item in error records.
+        on_done: Optional callback `(stage_name, result)` after each stage
+            succeeds for an item; if it raises, the item counts as failed.
+
+    Raises:
+        The first BaseException (e.g. KeyboardInterrupt, SystemExit) raised by a
+        stage fn, once all workers have shut down; remaining items are dropped.
+
+    Returns:
+        Dict with `results` (outputs of the last stage), `errors`
+        (`{"item", "stage", "error"}`; failed items don't reach later stages),
+        `stages` (per-stage completed/failed counts, busy seconds, items/sec and
+        max queue depth) and `wall_seconds`.
+    """
+    if not stages:
+        raise ValueError("at least one stage is required")
+
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    lock = threading.Lock()
+    results: list[Any] = []
+    errors: list[dict[str, Any]] = []
+    stats = [
+        {
+            "stage": st.name,
+            "kind": st.kind,
+            "workers": st.workers,
+            "completed": 0,
+            "failed": 0,
+            "busy_seconds": 0.0,
+            "max_queue_depth": 0,
+            "_first_start": None,
+            "_last_end": None,
+        }
+        for st in stages
+    ]
+    live_workers = [st.workers for st in stages]
+    stop = threading.Event()
+    fatal: list[BaseException] = []
+    pools = {i: ProcessPoolExecutor(max_workers=st.workers) for i, st in enumerate(stages) if st.kind == "process"}
+
+    def _put(i: int, item: Any) -> None:
+        queues[i].put(item)
+        depth = queues[i].qsize()
+        with lock:
+            if depth > stats[i]["max_queue_depth"]:
+                stats[i]["max_queue_depth"] = depth
+
+    def _worker(i: int) -> None:
+        stage = stages[i]
+        try:
+            while True:
+                item = queues[i].get()
+                if item is _DONE:
+                    break
+                if stop.is_set():
+                    continue  # keep draining so upstream stages never block
+                t0 = time.perf_counter()
+                with lock:
+                    if stats[i]["_first_start"] is None:
+                        stats[i]["_first_start"] = t0
+                try:
+                    if stage.kind == "process":
+                        out = pools[i].submit(stage.fn, item).result()
+                    else:
+                        out = stage.fn(item)
+                    if on_done is not None:
+                        on_done(stage.name, out)
+                    ok = True
+                except Exception as e:
+                    out, ok = None, False
+                    with lock:
+                        errors.append({"item": label(item), "stage": stage.name, "error": str(e)})
+                except BaseException as e:
+                    # KeyboardInterrupt/SystemExit: stop feeding work and re-raise in the caller.
+                    out, ok = None, False
+                    with lock:
+                        errors.append({"item": label(item), "stage": stage.name, "error": repr(e)})
+                        fatal.append(e)
+                    stop.set()
+                t1 = time.perf_counter()
+                with lock:
+                    st = stats[i]
+                    st["busy_seconds"] += t1 - t0
+                    st["_last_end"] = t1
+                    st["completed" if ok else "failed"] += 1
+                if not ok:
+                    continue
+                if i + 1 < len(stages):
+                    _put(i + 1, out)
+                else:
+                    with lock:
+                        results.append(out)
+        finally:
+            # The last worker of a stage to exit closes the next stage, even if it died.
+            with lock:
+                live_workers[i] -= 1
+                last = live_workers[i] == 0
+            if last and i + 1 < len(stages):
+                for _ in range(stages[i + 1].workers):
+                    queues[i + 1].put(_DONE)
+
+    wall0 = time.perf_counter()
+    threads = [
+        threading.Thread(target=_worker, args=(i,), name=f"pipeline-{st.name}-{n}", daemon=True)
+        for i, st in enumerate(stages)
+        for n in range(st.workers)
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for item in items:
+            if stop.is_set():
+                break
+            _put(0, item)
+        for _ in range(stages[0].workers):
+            queues[0].put(_DONE)
+        for t in threads:
+            t.join()
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+    wall = time.perf_counter() - wall0
+    if fatal:
+        raise fatal[0]
+
+    for st in stats:
+        first, last = st.pop("_first_start"), st.pop("_last_end")
+        active = (last - first) if first is not None and last is not None else 0.0
+        st["busy_seconds"] = round(st["busy_seconds"], 6)
+        st["items_per_second"] = round(st["completed"] / active, 3) if active > 0 else None
+
+    return {"results": results, "errors": errors, "stages": stats, "wall_seconds": round(wall, 6)}
@@ -0,0 +1,144 @@
+"""Opt-in CPU and memory profiling for `ThemeCommandRunner` operations.
+
+Enable it with `ThemeCommandRunner(..., profile_dir="profiles")`. Each public
+operation then writes three files per call into that directory (`<id>` keeps
+concurrent calls apart):
+
+  - `<op>-<timestamp>-<id>.prof`: raw cProfile stats (open with pstats/snakeviz).
+  - `<op>-<timestamp>-<id>.txt`: top functions by cumulative time.
+  - `<op>-<timestamp>-<id>.json`: wall/CPU time, tracemalloc peak, how much the
+    operation raised the process's peak RSS, and the process-wide peak RSS.
+
+When `profile_dir` is unset the wrapper costs one attribute check per call.
+Nested calls are profiled as part of the outermost one on the same thread;
+operations running concurrently on other threads get their own reports, but
+their tracemalloc peaks overlap. Python 3.12+ allows one cProfile profiler at
+a time, so an operation started while another is being profiled only gets the
+`.json` report (with `"cprofile": false`). Work done in worker processes (e.g.
+`remove_app_blocks_batch`) is not profiled.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TOP_FUNCTIONS = 30
+
+# tracemalloc is process-wide: it stays on while any profiled operation runs.
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def profiled(fn: F) -> F:
+    """Profile `fn` when the runner it's bound to has a `profile_dir` set."""
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if self.profile_dir is None or getattr(self._profiling, "active", False):
+            return fn(self, *args, **kwargs)
+        return _run_profiled(self, fn, args, kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_users = 1
+        elif _tracing_users:
+            _tracing_users += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users:
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+
+
+def _run_profiled(runner, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    out_dir = Path(runner.profile_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{fn.__name__}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+    _start_tracing()
+    baseline, _ = tracemalloc.get_traced_memory()
+    rss_before = _peak_rss_bytes()
+
+    profiler = cProfile.Profile()
+    runner._profiling.active = True
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process.
+            profiler = None
+        try:
+            return fn(runner, *args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        runner._profiling.active = False
+        _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        _stop_tracing()
+        rss_after = _peak_rss_bytes()
+
+        if profiler is not None:
+            profiler.dump_stats(str(out_dir / f"{stem}.prof"))
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            (out_dir / f"{stem}.txt").write_text(buf.getvalue(), encoding="utf-8")
+
+        report = {
+            "operation": fn.__name__,
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "tracemalloc_peak_bytes": max(0, peak - baseline),
+            # ru_maxrss only ever grows: this is how much this operation raised it.
+            "peak_rss_increase_bytes": (
+                rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            ),
+            "process_peak_rss_bytes": rss_after,
+            "cprofile": profiler is not None,
+            "error": error,
+        }
+        (out_dir / f"{stem}.json").write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
@@ -5,6 +5,12 @@ The implementation has moved into `ThemeCommandRunner.remove_app_blocks()`.
 Usage:
   poetry run python -m shopify_theme_utils.remove_app_blocks --store <store-shortname>
   poetry run python -m shopify_theme_utils.remove_app_blocks --store <store-shortname> --dry-run
+  poetry run python -m shopify_theme_utils.remove_app_blocks --store <store-shortname> --backups-root previous-themes
+
+--backups-root cleans themes in worker processes. Scripts that call
+`ThemeCommandRunner.remove_app_blocks_batch()` themselves must keep their
+top-level code under `if __name__ == "__main__":`, because on Windows and
+macOS each worker re-imports the calling script.
 """
 
 from __future__ import annotations
@@ -19,9 +25,19 @@ def main() -> None:
     parser.add_argument("--store", required=True, help="Shopify store shortname, e.g. mystore.myshopify.com")
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--no-scrub-missing-metafields", action="store_true")
+    parser.add_argument("--backups-root", help="Clean every manifest-tagged theme backup under this dir instead")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --backups-root")
     args = parser.parse_args()
 
     runner = ThemeCommandRunner(store_shortname=args.store)
+    if args.backups_root:
+        runner.remove_app_blocks_batch(
+            args.backups_root,
+            dry_run=args.dry_run,
+            scrub_missing_metafields=not args.no_scrub_missing_metafields,
+            max_workers=args.workers,
+        )
+        return
     runner.remove_app_blocks(dry_run=args.dry_run, scrub_missing_metafields=not args.no_scrub_missing_metafields)
 
 
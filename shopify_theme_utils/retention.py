@@ -0,0 +1,211 @@
+"""Retention / garbage collection for theme backups under `previous-themes/`.
+
+A retention run is split into three steps so callers can stop after any of them:
+
+  1. `scan_backups()` finds manifest-tagged backup dirs and measures their size.
+  2. `plan_retention()` decides which backups to evict (pure, no disk access).
+  3. `delete_backups()` moves evicted dirs into a trash dir (a cheap rename) and
+     removes them in a background thread so other jobs aren't blocked. Bytes
+     still in the trash dir are reported by `trash_size_bytes()`.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from shopify_theme_utils.manifest import iter_backup_dirs, parse_manifest_ts
+
+TRASH_DIRNAME = ".trash"
+
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def dir_size_bytes(path: str | Path) -> int:
+    """Total size of regular files below `path` (symlinks are not followed)."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def format_bytes(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    size = float(n)
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            break
+    return f"{size:.1f} {unit}"
+
+
+def scan_backups(root: str | Path, *, max_workers: int = 8) -> list[dict[str, Any]]:
+    """Return one record per manifest-tagged backup dir under `root`.
+
+    Records contain: path, theme_id, store, title, downloaded_at (datetime or None)
+    and size_bytes. Sizes are measured concurrently since the walk is I/O bound.
+    """
+    found = list(iter_backup_dirs(root))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        sizes = list(pool.map(lambda item: dir_size_bytes(item[0]), found))
+
+    backups = []
+    for (theme_dir, manifest), size in zip(found, sizes):
+        backups.append(
+            {
+                "path": str(theme_dir),
+                "theme_id": manifest.get("theme_id"),
+                "store": manifest.get("store"),
+                "title": manifest.get("title"),
+                "downloaded_at": parse_manifest_ts(manifest.get("downloaded_at")),
+                "size_bytes": size,
+            }
+        )
+    return backups
+
+
+def plan_retention(
+    backups: list[dict[str, Any]],
+    *,
+    keep_last: int | None = None,
+    max_age_days: float | None = None,
+    max_total_bytes: int | None = None,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """Decide which backups to keep and which to evict.
+
+    Policies are applied in order; a backup evicted by an earlier policy isn't
+    considered by later ones.
+
+      - keep_last: keep the N most recently downloaded backups per (store, theme_id).
+      - max_age_days: evict backups downloaded longer ago than this. Backups without
+        a readable `downloaded_at` are never evicted by age.
+      - max_total_bytes: evict least-recently-downloaded backups until the kept
+        set fits the budget.
+
+    Returns:
+        Dict with `keep`, `delete` (records gain a `reason` key), `kept_bytes` and
+        `reclaimable_bytes`.
+    """
+    if keep_last is not None and int(keep_last) < 0:
+        raise ValueError("keep_last must be >= 0")
+    if max_age_days is not None and max_age_days < 0:
+        raise ValueError("max_age_days must be >= 0")
+    if max_total_bytes is not None and max_total_bytes < 0:
+        raise ValueError("max_total_bytes must be >= 0")
+
+    now = now or datetime.now(timezone.utc)
+
+    def _ts(b: dict[str, Any]) -> datetime:
+        return b.get("downloaded_at") or _OLDEST
+
+    delete: list[dict[str, Any]] = []
+    kept = list(backups)
+
+    if keep_last is not None:
+        groups: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+        for b in kept:
+            groups[(str(b.get("store")), str(b.get("theme_id")))].append(b)
+        kept = []
+        for items in groups.values():
+            items.sort(key=_ts, reverse=True)
+            kept.extend(items[: int(keep_last)])
+            delete.extend({**b, "reason": "keep_last"} for b in items[int(keep_last):])
+
+    if max_age_days is not None:
+        cutoff = now - timedelta(days=max_age_days)
+        still_kept = []
+        for b in kept:
+            if b.get("downloaded_at") is not None and b["downloaded_at"] < cutoff:
+                delete.append({**b, "reason": "max_age"})
+            else:
+                still_kept.append(b)
+        kept = still_kept
+
+    if max_total_bytes is not None:
+        # LRU: evict the oldest downloads first until we're within budget.
+        kept.sort(key=_ts)
+        total = sum(b["size_bytes"] for b in kept)
+        i = 0
+        while total > max_total_bytes and i < len(kept):
+            total -= kept[i]["size_bytes"]
+            delete.append({**kept[i], "reason": "max_total_bytes"})
+            i += 1
+        kept = kept[i:]
+
+    kept.sort(key=_ts, reverse=True)
+    return {
+        "keep": kept,
+        "delete": delete,
+        "kept_bytes": sum(b["size_bytes"] for b in kept),
+        "reclaimable_bytes": sum(b["size_bytes"] for b in delete),
+    }
+
+
+def trash_size_bytes(root: str | Path) -> int:
+    """Bytes still waiting in `<root>/.trash/` (deletes in progress or interrupted)."""
+    return dir_size_bytes(Path(root) / TRASH_DIRNAME)
+
+
+def delete_backups(root: str | Path, paths: list[str | Path], *, wait: bool = False) -> threading.Thread | None:
+    """Remove backup dirs without blocking on the recursive delete.
+
+    Each call moves its dirs into its own `<root>/.trash/<uuid>/` batch (a rename:
+    atomic and O(1) on the same filesystem), so they disappear from
+    `previous-themes/` immediately. The `rmtree` of that batch runs in a
+    background thread; it isn't a daemon thread, so the interpreter finishes the
+    delete before exiting. Concurrent calls never touch each other's batches.
+
+    Returns:
+        The cleanup thread (already joined if `wait=True`), or None if nothing to do.
+    """
+    root = Path(root).resolve()
+    srcs = []
+    for p in paths:
+        src = Path(p).resolve()
+        if src.parent != root:
+            raise ValueError(f"Refusing to delete {src}: not a direct child of {root}")
+        if src.exists():
+            srcs.append(src)
+    if not srcs:
+        return None
+
+    trash = root / TRASH_DIRNAME
+    batch = trash / uuid.uuid4().hex
+    batch.mkdir(parents=True)
+    for src in srcs:
+        os.replace(src, batch / src.name)
+
+    def _purge() -> None:
+        shutil.rmtree(batch, ignore_errors=True)
+        try:
+            trash.rmdir()
+        except OSError:
+            pass  # other batches still in progress (or already removed)
+
+    thread = threading.Thread(target=_purge, name="shopify-theme-utils-trash")
+    thread.start()
+    if wait:
+        thread.join()
+    return thread
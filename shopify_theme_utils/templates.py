@@ -0,0 +1,390 @@
+"""JSON template cleanup and pre-push validation used by `ThemeCommandRunner`.
+
+Kept at module level (rather than nested in the runner) so the same code can run
+in worker processes when cleaning many theme dirs at once.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from rich import print
+
+from shopify_theme_utils import json_codec
+
+from shopify_theme_utils.theme_tree import (  # noqa: F401 (parse_template_text is part of this module's API)
+    _LEADING_BLOCK_COMMENT_RE,
+    ThemeTree,
+    dump_template_json,
+    parse_template_text,
+)
+
+# Shopify dev stores often don't have the same metafield definitions as prod.
+# These strings in JSON templates will cause `shopify theme push` to fail.
+_BAD_DYNAMIC_SOURCE_SUBSTRS = [
+    "product.metafields.global.sustainability",
+    "product.metafields.c_f.product_details",
+    "product.metafields.c_f.product_sizing",
+    "product.metafields.c_f.product_care",
+    "product.metafields.c_f.product_materials",
+]
+
+# Skip-cache of templates already known to be clean (see clean_templates_dir).
+# Bump _CLEAN_RULES_VERSION whenever the cleanup logic changes.
+CLEAN_CACHE_NAME = ".shopify-theme-utils-clean-cache.json"
+_CLEAN_RULES_VERSION = 1
+
+
+def read_template_json(template_path: Path) -> dict[str, Any]:
+    return parse_template_text(template_path.read_text(encoding="utf-8", errors="replace"))
+
+
+def write_template_json(template_path: Path, data: dict[str, Any]) -> None:
+    template_path.write_text(dump_template_json(data), encoding="utf-8")
+
+
+def _is_app_block(block: dict[str, Any]) -> bool:
+    t = (block.get("type") or "")
+    return isinstance(t, str) and t.startswith("shopify://apps/")
+
+
+def clean_template(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    """Remove app blocks (and their block_order entries) in place. Returns (data, removed)."""
+    removed = 0
+    sections = data.get("sections") or {}
+    if not isinstance(sections, dict):
+        return data, 0
+    for sec in sections.values():
+        if not isinstance(sec, dict):
+            continue
+        blocks = sec.get("blocks")
+        if not isinstance(blocks, dict):
+            continue
+
+        remove_ids = [
+            bid
+            for bid, b in blocks.items()
+            if isinstance(b, dict) and _is_app_block(b)
+        ]
+        for bid in remove_ids:
+            blocks.pop(bid, None)
+        removed += len(remove_ids)
+
+        order = sec.get("block_order")
+        if isinstance(order, list) and remove_ids:
+            remove_set = set(remove_ids)
+            sec["block_order"] = [x for x in order if x not in remove_set]
+    return data, removed
+
+
+def _scrub_missing_metafield_dynamic_sources(data: dict[str, Any]) -> bool:
+    """Blank out collapsible_tab content referencing known-missing metafields, in place."""
+    changed = False
+    sections = data.get("sections") or {}
+    if not isinstance(sections, dict):
+        return False
+
+    for section in sections.values():
+        if not isinstance(section, dict):
+            continue
+        blocks = section.get("blocks")
+        if not isinstance(blocks, dict):
+            continue
+        for block in blocks.values():
+            if not isinstance(block, dict):
+                continue
+            if block.get("type") != "collapsible_tab":
+                continue
+            settings = block.get("settings")
+            if not isinstance(settings, dict):
+                continue
+            content = settings.get("content")
+            if not isinstance(content, str):
+                continue
+
+            if any(s in content for s in _BAD_DYNAMIC_SOURCE_SUBSTRS):
+                settings["content"] = ""
+                changed = True
+    return changed
+
+
+def _ruleset_version(scrub_missing_metafields: bool) -> str:
+    """Fingerprint of the cleanup rules; a cache built under other rules is discarded."""
+    rules = {
+        "version": _CLEAN_RULES_VERSION,
+        "app_block_prefix": "shopify://apps/",
+        "scrub": sorted(_BAD_DYNAMIC_SOURCE_SUBSTRS) if scrub_missing_metafields else [],
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_clean_cache(theme_dir: Path, ruleset: str) -> dict[str, dict[str, Any]]:
+    try:
+        data = json_codec.loads((theme_dir / CLEAN_CACHE_NAME).read_bytes())
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("ruleset") != ruleset or not isinstance(data.get("files"), dict):
+        return {}
+    return data["files"]
+
+
+def _save_clean_cache(theme_dir: Path, ruleset: str, files: dict[str, dict[str, Any]]) -> None:
+    path = theme_dir / CLEAN_CACHE_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    payload = {"ruleset": ruleset, "files": files}
+    tmp.write_text(json_codec.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def clean_templates_dir(
+    theme_dir: str | Path,
+    *,
+    dry_run: bool = False,
+    scrub_missing_metafields: bool = True,
+    quiet: bool = False,
+    use_cache: bool = True,
+    tree: ThemeTree | None = None,
+) -> dict[str, Any]:
+    """Clean every `templates/*.json` below `theme_dir`.
+
+    See `ThemeCommandRunner.remove_app_blocks()` for the behavior. With
+    `quiet=True` nothing is printed, which keeps output readable when many
+    theme dirs are processed in parallel.
+
+    With `use_cache=True`, templates already known to be clean are recorded in
+    `<theme_dir>/.shopify-theme-utils-clean-cache.json` (size, mtime, sha256 and
+    the ruleset fingerprint). Later runs skip them after a single `stat`; if
+    only the mtime moved, the hash decides and parsing is still avoided. The
+    cache is read but never written during a dry run.
+
+    If `tree` is given it is used instead of reading `theme_dir` directly, so
+    templates it already parsed aren't parsed again. Only the templates this
+    call changed are written from it; other edits staged in the tree are left
+    for their owner to flush.
+
+    Returns:
+        Summary dict: scanned/changed/removed_app_blocks/scrubbed_metafields/skipped_unchanged.
+    """
+    if tree is None:
+        tree = ThemeTree(theme_dir)
+    theme_dir = tree.root
+    templates_dir = theme_dir / "templates"
+    summary: dict[str, Any] = {
+        "templates_dir": str(templates_dir),
+        "scanned": 0,
+        "changed": 0,
+        "removed_app_blocks": 0,
+        "scrubbed_metafields": 0,
+        "skipped_unchanged": 0,
+        "files_changed": [],
+    }
+
+    if not templates_dir.is_dir():
+        if not quiet:
+            print(f"[yellow]No templates dir found:[/yellow] {templates_dir}")
+        return summary
+
+    ruleset = _ruleset_version(scrub_missing_metafields)
+    cache = _load_clean_cache(theme_dir, ruleset) if use_cache else {}
+    new_cache: dict[str, dict[str, Any]] = {}
+    to_write: list[str] = []
+    staged = set(tree.dirty)
+
+    def _cache_entry(rel: str) -> dict[str, Any]:
+        size, mtime_ns = tree.stat(rel)
+        # A stat match is only trusted for files last modified before the tree
+        # was scanned; anything newer could change again within the same mtime tick.
+        return {"size": size, "mtime_ns": mtime_ns, "sha256": tree.digest(rel), "checked_ns": tree.scanned_ns}
+
+    templates = tree.files("templates", ".json")
+    for rel in templates:
+        summary["scanned"] += 1
+        template_path = tree.path(rel)
+        name = template_path.name
+
+        cached = cache.get(name) if rel not in staged else None
+        if cached:
+            size, mtime_ns = tree.stat(rel)
+            if (
+                cached.get("size") == size
+                and cached.get("mtime_ns") == mtime_ns
+                and mtime_ns < cached.get("checked_ns", 0)
+            ):
+                new_cache[name] = cached
+                summary["skipped_unchanged"] += 1
+                continue
+            try:
+                if cached.get("sha256") == tree.digest(rel):
+                    new_cache[name] = _cache_entry(rel)
+                    summary["skipped_unchanged"] += 1
+                    continue
+            except OSError:
+                pass
+
+        try:
+            data = tree.read_json(rel)
+        except Exception as e:
+            if not quiet:
+                print(f"[red]Skipping unreadable JSON:[/red] {template_path} ({e})")
+            continue
+        if dry_run:
+            # Don't leave half-cleaned data behind in a tree other operations share.
+            data = copy.deepcopy(data)
+
+        data, removed = clean_template(data)
+        changed = False
+
+        if removed:
+            summary["removed_app_blocks"] += removed
+            changed = True
+            if not quiet:
+                print(f"{rel}: removed {removed} app blocks")
+
+        if scrub_missing_metafields and name.startswith("product"):
+            if _scrub_missing_metafield_dynamic_sources(data):
+                summary["scrubbed_metafields"] += 1
+                changed = True
+                if not quiet:
+                    msg = f"{rel}: scrubbed missing-metafield dynamic sources"
+                    print(msg if not dry_run else f"(dry-run) {msg}")
+
+        if changed:
+            summary["changed"] += 1
+            summary["files_changed"].append(str(template_path))
+            if not dry_run:
+                tree.mark_dirty(rel)
+                to_write.append(rel)
+            continue
+
+        if rel not in staged:
+            try:
+                new_cache[name] = _cache_entry(rel)
+            except OSError:
+                pass
+
+    if not dry_run:
+        tree.flush(paths=to_write)
+        for rel in to_write:
+            new_cache[tree.path(rel).name] = _cache_entry(rel)
+
+    if use_cache and not dry_run and new_cache != cache:
+        try:
+            _save_clean_cache(theme_dir, ruleset, new_cache)
+        except OSError as e:
+            if not quiet:
+                print(f"[yellow]Could not write clean cache:[/yellow] {e}")
+
+    if not quiet:
+        print(f"Processed {len(templates)} templates in {templates_dir}")
+    return summary
+
+
+def _check_block_container(container: dict[str, Any], where: str) -> list[str]:
+    """Check blocks/block_order consistency for a section (or a nested theme block)."""
+    problems: list[str] = []
+    blocks = container.get("blocks")
+    order = container.get("block_order")
+    if blocks is None and order is None:
+        return problems
+    if blocks is not None and not isinstance(blocks, dict):
+        return [f"{where}: 'blocks' must be an object"]
+    if order is not None and not isinstance(order, list):
+        return [f"{where}: 'block_order' must be a list"]
+    blocks = blocks or {}
+    order = order or []
+
+    for bid in order:
+        if bid not in blocks:
+            problems.append(f"{where}: block_order references missing block '{bid}'")
+    listed = set(order)
+    for bid, block in blocks.items():
+        # Static theme blocks are rendered by the section itself and never appear in block_order.
+        is_static = isinstance(block, dict) and block.get("static") is True
+        if bid not in listed and not is_static:
+            problems.append(f"{where}: block '{bid}' is not listed in block_order")
+        if isinstance(block, dict):
+            problems.extend(_check_block_container(block, f"{where} > block '{bid}'"))
+    return problems
+
+
+def validate_template(data: Any, section_types: set[str] | None = None) -> list[str]:
+    """Return problems in a parsed JSON template that would make `shopify theme push` fail.
+
+    If `section_types` is given (stems of `sections/*.liquid`), section types
+    without a matching file are reported too.
+    """
+    if not isinstance(data, dict):
+        return ["template must be a JSON object"]
+    sections = data.get("sections")
+    if not isinstance(sections, dict):
+        return ["missing or invalid 'sections' object"]
+
+    problems: list[str] = []
+    order = data.get("order")
+    if isinstance(order, list):
+        for sid in order:
+            if sid not in sections:
+                problems.append(f"order references missing section '{sid}'")
+
+    for sid, sec in sections.items():
+        where = f"section '{sid}'"
+        if not isinstance(sec, dict):
+            problems.append(f"{where}: must be an object")
+            continue
+        stype = sec.get("type")
+        if not isinstance(stype, str) or not stype:
+            problems.append(f"{where}: missing 'type'")
+        elif section_types is not None and not stype.startswith("shopify://") and stype not in section_types:
+            problems.append(f"{where}: type '{stype}' has no sections/{stype}.liquid")
+        problems.extend(_check_block_container(sec, where))
+    return problems
+
+
+def _validate_template_file(tree: ThemeTree, rel: str, section_types: set[str]) -> list[str]:
+    try:
+        data = tree.read_json(rel)
+    except OSError as e:
+        return [f"unreadable: {e}"]
+    except json.JSONDecodeError as e:
+        # Report positions against the file on disk, not the comment-stripped text.
+        raw = tree.read_text(rel)
+        m = _LEADING_BLOCK_COMMENT_RE.match(raw)
+        line = e.lineno + (raw[: m.end()].count("\n") if m else 0)
+        return [f"invalid JSON: {e.msg} (line {line} column {e.colno})"]
+    return validate_template(data, section_types)
+
+
+def validate_templates_dir(
+    theme_dir: str | Path,
+    *,
+    tree: ThemeTree | None = None,
+) -> dict[str, Any]:
+    """Validate every JSON template below `<theme_dir>/templates`.
+
+    Runs serially: parsing holds the GIL with either JSON backend, so threads
+    would only add overhead.
+
+    If `tree` is given, templates are read (and parsed at most once) through it.
+
+    Returns:
+        Summary dict: templates_dir/checked/errors, where each error is
+        `{"path": <relative path>, "message": ...}`.
+    """
+    if tree is None:
+        tree = ThemeTree(theme_dir)
+    templates_dir = tree.root / "templates"
+    summary: dict[str, Any] = {"templates_dir": str(templates_dir), "checked": 0, "errors": []}
+
+    section_types = {rel[len("sections/"):-len(".liquid")] for rel in tree.files("sections", ".liquid")}
+    templates = tree.files("templates", ".json", recursive=True)
+    results = [_validate_template_file(tree, rel, section_types) for rel in templates]
+
+    summary["checked"] = len(templates)
+    for rel, problems in zip(templates, results):
+        summary["errors"].extend({"path": rel, "message": msg} for msg in problems)
+    return summary
@@ -2,33 +2,45 @@ import os
 import subprocess
 from pathlib import Path
 from rich import print
+from rich.markup import escape
 import shutil
 import csv
-import json
+import io
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import Any
 from datetime import datetime, timezone
 
+from shopify_theme_utils import json_codec
+from shopify_theme_utils.code_search import CODE_INDEX_NAME, CodeSearchIndex
+from shopify_theme_utils.csv_shards import INDEX_VERSION, index_shard_files, shard_rows
+from shopify_theme_utils.manifest import MANIFEST_NAME, iter_backup_dirs, parse_manifest_ts, read_manifest
+from shopify_theme_utils.pipeline import Stage, run_pipeline
+from shopify_theme_utils.profiling import profiled
+from shopify_theme_utils.retention import (
+    TRASH_DIRNAME,
+    delete_backups,
+    format_bytes,
+    plan_retention,
+    scan_backups,
+    trash_size_bytes,
+)
+from shopify_theme_utils.templates import (  # noqa: F401 (re-exported for backwards compatibility)
+    _BAD_DYNAMIC_SOURCE_SUBSTRS,
+    _LEADING_BLOCK_COMMENT_RE,
+    clean_templates_dir,
+    validate_templates_dir,
+)
+from shopify_theme_utils.theme_inventory import INVENTORY_NAME, ThemeInventory
+from shopify_theme_utils.theme_tree import ThemeTree
+
 
 class LiveThemeOverwriteError(RuntimeError):
     """Raised when an operation would overwrite the live theme without explicit consent."""
 
 
-# Shopify dev stores often don't have the same metafield definitions as prod.
-# These strings in JSON templates will cause `shopify theme push` to fail.
-_BAD_DYNAMIC_SOURCE_SUBSTRS = [
-    "product.metafields.global.sustainability",
-    "product.metafields.c_f.product_details",
-    "product.metafields.c_f.product_sizing",
-    "product.metafields.c_f.product_care",
-    "product.metafields.c_f.product_materials",
-]
-
-# Shopify admin sometimes prefixes JSON templates with a /* ... */ comment header.
-# That's not valid JSON, so we strip it before parsing.
-_LEADING_BLOCK_COMMENT_RE = re.compile(r"^\s*/\*.*?\*/\s*", re.DOTALL)
-
-
 def find_theme_base_dir():
     base_dir = Path.cwd()
     if base_dir.name == "theme_files":
@@ -44,6 +56,35 @@ def _run_command(command):
     subprocess.run(command)
 
 
+class _DirectFiles:
+    """The subset of the `ThemeTree` file API used by `csv_to_json`, writing straight to disk."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def exists(self, rel: str) -> bool:
+        return (self.root / rel).is_file()
+
+    def read_bytes(self, rel: str) -> bytes:
+        return (self.root / rel).read_bytes()
+
+    def write_text(self, rel: str, text: str) -> None:
+        (self.root / rel).write_text(text, encoding="utf-8")
+
+    def delete(self, rel: str) -> None:
+        (self.root / rel).unlink(missing_ok=True)
+
+
+def _clean_pipeline_item(item: dict[str, Any]) -> dict[str, Any]:
+    """CPU stage of `restore_themes_pipeline()`; module-level so it can run in a worker process."""
+    summary = clean_templates_dir(
+        item["path"],
+        scrub_missing_metafields=item["scrub_missing_metafields"],
+        quiet=True,
+    )
+    return {**item, "clean": summary}
+
+
 class ThemeCommandRunner:
     def __init__(self, **kwargs):
         self.store_shortname = kwargs['store_shortname']
@@ -51,6 +92,15 @@ class ThemeCommandRunner:
         self.shopify_cli_executable = "shopify"
         self.shopify_theme_dir = find_theme_base_dir()
         self.project_root_dir = self.shopify_theme_dir.parent
+        # Optional per-operation CPU/memory reports; see profiling.py.
+        profile_dir = kwargs.get('profile_dir')
+        self.profile_dir = self._resolve_project_path(profile_dir) if profile_dir else None
+        # Per-thread "inside a profiled call" flag; see profiling.py.
+        self._profiling = threading.local()
+        # Local SQLite theme inventory; see theme_inventory.py.
+        self.inventory_path = self._resolve_project_path(kwargs.get('inventory_path') or INVENTORY_NAME)
+        # Full-text index over theme sources; see code_search.py.
+        self.code_index_path = self._resolve_project_path(kwargs.get('code_index_path') or CODE_INDEX_NAME)
         print("*******************************")
         print("running Shopify Utils")
         print("run in terminal to authenticate...")
@@ -68,7 +118,72 @@ class ThemeCommandRunner:
             return title.strip()
         return ""
 
-    def theme_push(self, theme_name=None):
+    def load_theme_tree(self) -> ThemeTree:
+        """Index theme_files once so several operations can share parsed files.
+
+        Example:
+            tree = runner.load_theme_tree()
+            runner.remove_app_blocks(tree=tree)
+            runner.theme_push(tree=tree)
+        """
+        return ThemeTree(self.shopify_theme_dir)
+
+    def open_inventory(self) -> ThemeInventory:
+        """Open the local theme inventory (see `refresh_inventory()`).
+
+        Example:
+            with runner.open_inventory() as inv:
+                inv.stores_with_theme("Summer sale")
+        """
+        return ThemeInventory(self.inventory_path)
+
+    @profiled
+    def validate_templates(self, theme_dir: str | Path | None = None, *, tree: ThemeTree | None = None) -> dict[str, Any]:
+        """Check JSON templates for problems that make `shopify theme push` fail.
+
+        Catches invalid JSON (after stripping Shopify's leading comment header),
+        `block_order` entries pointing at missing blocks, blocks missing from
+        `block_order`, and section types with no matching `sections/*.liquid`.
+
+        Args:
+            theme_dir: Theme directory to check (default: theme_files).
+            tree: Optional shared `ThemeTree` (see `load_theme_tree()`).
+
+        Returns:
+            Summary dict: templates_dir/checked/errors.
+        """
+        theme_path = Path(theme_dir) if theme_dir is not None else self.shopify_theme_dir
+        summary = validate_templates_dir(theme_path, tree=tree)
+        for err in summary["errors"]:
+            print(f"[red]{escape(err['path'])}:[/red] {escape(err['message'])}")
+        if summary["errors"]:
+            print(f"[bold red]{len(summary['errors'])} template problems in {summary['checked']} templates.[/bold red]")
+        return summary
+
+    def _validate_before_push(self, tree: ThemeTree | None = None) -> bool:
+        summary = self.validate_templates(tree=tree)
+        if summary["errors"]:
+            print(
+                "[bold red]Refusing to push: fix the template problems above.[/bold red]\n"
+                "To push anyway, re-run with validate=False."
+            )
+            return False
+        return True
+
+    @profiled
+    def theme_push(self, theme_name=None, *, validate=True, tree=None):
+        """Push theme_files as a new unpublished theme (or to `theme_name`).
+
+        A shared `tree` with pending edits is flushed first: the CLI pushes
+        what is on disk, and that is what gets validated.
+
+        Returns:
+            True if the push command was started, False if validation refused it.
+        """
+        if tree is not None and tree.dirty:
+            tree.flush()
+        if validate and not self._validate_before_push(tree):
+            return False
         print(self.shopify_theme_dir)
         command = [
             self.shopify_cli_executable, "theme", "push", "--unpublished",
@@ -78,13 +193,19 @@ class ThemeCommandRunner:
             print(f"pushing theme: {theme_name}")
             command += ["--theme", theme_name]
         _run_command(command)
+        return True
 
-    def theme_push_overwrite(self, theme_id, *, allow_live=None):
+    @profiled
+    def theme_push_overwrite(self, theme_id, *, allow_live=None, validate=True, tree=None):
         """Push local files to an *existing* theme, overwriting its contents.
 
         Args:
             theme_id: Existing Shopify theme ID.
             allow_live: Optional override for the instance's allow_live flag.
+            validate: If True (default), refuse to push when local JSON
+                templates fail `validate_templates()`.
+            tree: Optional shared `ThemeTree` used for validation; pending
+                edits in it are flushed to disk before validating and pushing.
 
         Notes:
             - Does NOT pass --unpublished; it targets the given theme.
@@ -98,6 +219,12 @@ class ThemeCommandRunner:
 
         effective_allow_live = self.allow_live if allow_live is None else allow_live
 
+        # Local checks first: they take milliseconds, the live-theme lookup is a CLI call.
+        if tree is not None and tree.dirty:
+            tree.flush()
+        if validate and not self._validate_before_push(tree):
+            return False
+
         # Guardrail: prevent accidental overwrites of the live theme.
         # Shopify theme IDs are numeric; we string-cast to be safe.
         if not effective_allow_live:
@@ -132,14 +259,17 @@ class ThemeCommandRunner:
         _run_command(command)
         return True
 
-    def _get_live_theme_id(self):
-        """Best-effort helper to find the live theme ID via `shopify theme list --json`."""
+    def _get_live_theme_id(self, store=None):
+        """Best-effort helper to find the live theme ID via `shopify theme list --json`.
+
+        `store` defaults to this runner's store.
+        """
         command = [
             self.shopify_cli_executable,
             "theme",
             "list",
             "--store",
-            self.store_shortname,
+            store or self.store_shortname,
             "--json",
         ]
         proc = subprocess.run(command, capture_output=True, text=True)
@@ -151,7 +281,7 @@ class ThemeCommandRunner:
         start = min([i for i in (stdout.find("["), stdout.find("{")) if i != -1], default=-1)
         if start == -1:
             raise ValueError("Unexpected JSON output from shopify theme list")
-        payload = json.loads(stdout[start:])
+        payload = json_codec.loads(stdout[start:])
 
         # Common shape is a list of themes with a role field.
         if isinstance(payload, dict) and "themes" in payload:
@@ -168,6 +298,7 @@ class ThemeCommandRunner:
                 return theme.get("id")
         return None
 
+    @profiled
     def theme_publish(self, theme_name):
         print(f"publishing theme: {theme_name}")
         command = [
@@ -176,6 +307,7 @@ class ThemeCommandRunner:
         ]
         _run_command(command)
 
+    @profiled
     def theme_pull(self, theme_name=None, theme_id=None):
         if theme_name:
             print(f"pulling existing theme: {theme_name}")
@@ -197,6 +329,7 @@ class ThemeCommandRunner:
             ]
         _run_command(command)
 
+    @profiled
     def theme_list(self):
         print("listing themes")
         command = [
@@ -205,24 +338,92 @@ class ThemeCommandRunner:
         ]
         _run_command(command)
 
+    @profiled
     def theme_test_local(self):
         print("shopify theme dev - running locally")
         command = [self.shopify_cli_executable, "theme", "dev"]
         _run_command(command)
 
-    def csv_to_json(self, csv_filename, json_filename, first_header_name):
+    @profiled
+    def csv_to_json(
+        self,
+        csv_filename,
+        json_filename,
+        first_header_name,
+        *,
+        shard_max_bytes=None,
+        shard_by="hash",
+        tree=None,
+    ):
+        """Convert an `assets/` CSV into a JSON object keyed by `first_header_name`.
+
+        By default a single `assets/<json_filename>` is written. With
+        `shard_max_bytes`, rows are split into `<stem>-<n>.json` assets that each
+        stay under the byte budget, plus a `<stem>-index.json` asset telling the
+        storefront which shard holds a key (see `csv_shards` for the layout).
+        Shards listed in the previous index but not produced by this run are
+        removed; other assets are left alone.
+
+        Args:
+            csv_filename: CSV file in assets/.
+            json_filename: Output file name in assets/ (also the shard name stem).
+            first_header_name: Column used as the lookup key.
+            shard_max_bytes: Optional per-shard size budget in bytes.
+            shard_by: "hash" (FNV-1a of the key) or "range" (sorted key ranges).
+            tree: Optional shared `ThemeTree`. Output is staged in it and
+                written by the caller's next `tree.flush()`; without a tree
+                files are read and written directly.
+
+        Returns:
+            None for single-file output, else a summary dict with the index
+            path and per-shard file names, row counts and sizes.
+        """
+        files = tree if tree is not None else _DirectFiles(self.shopify_theme_dir)
         assets_dir = self.shopify_theme_dir / "assets"
-        csv_filepath = assets_dir / csv_filename
-        json_filepath = assets_dir / json_filename
         data = {}
-        with open(csv_filepath, encoding='utf-8') as csvf:
-            csv_reader = csv.DictReader(csvf)
-            for row in csv_reader:
-                key = row[first_header_name]
-                data[key] = row
-        with open(json_filepath, 'w', encoding='utf-8') as jsonf:
-            json.dump(data, jsonf, indent=4)
+        raw = files.read_bytes(f"assets/{csv_filename}")
+        # TextIOWrapper translates newlines like open() does (CRLF inside quoted fields -> LF).
+        csv_reader = csv.DictReader(io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8"))
+        for row in csv_reader:
+            key = row[first_header_name]
+            data[key] = row
+        if shard_max_bytes is None:
+            files.write_text(f"assets/{json_filename}", json_codec.dumps(data, indent=4))
+            return None
+
+        shards, index = shard_rows(data, int(shard_max_bytes), strategy=shard_by)
+        stem = Path(json_filename).stem
+        index_rel = f"assets/{stem}-index.json"
+        # Only shards the previous index listed are ours to remove.
+        previous_shards = []
+        if files.exists(index_rel):
+            try:
+                previous_shards = index_shard_files(json_codec.loads(files.read_bytes(index_rel)))
+            except ValueError:
+                previous_shards = []
+        shard_names = [f"{stem}-{i}.json" for i in range(len(shards))]
+        summary = {"index": str(assets_dir / f"{stem}-index.json"), "rows": len(data), "shards": []}
+        for name, shard in zip(shard_names, shards):
+            text = json_codec.dumps(shard, indent=4)
+            files.write_text(f"assets/{name}", text)
+            summary["shards"].append({"file": name, "rows": len(shard), "bytes": len(text.encode("utf-8"))})
+
+        if index["strategy"] == "range":
+            index["shards"] = [{"file": name, **b} for name, b in zip(shard_names, index.pop("bounds"))]
+        else:
+            index["shards"] = shard_names
+        index = {"version": INDEX_VERSION, "key": first_header_name, **index}
+        files.write_text(index_rel, json_codec.dumps(index, indent=4))
 
+        shard_name_re = re.compile(rf"^{re.escape(stem)}-\d+\.json$")
+        for name in previous_shards:
+            if shard_name_re.match(name) and name not in shard_names and files.exists(f"assets/{name}"):
+                files.delete(f"assets/{name}")
+
+        print(f"Wrote {len(shards)} shards ({shard_by}) + index for {len(data)} rows from {csv_filename}")
+        return summary
+
+    @profiled
     def rebuild_shopify_dir(self):
         print("rebuilding shopify dir")
         for item in self.shopify_theme_dir.iterdir():
@@ -234,6 +435,7 @@ class ThemeCommandRunner:
             except Exception as e:
                 print(f'Failed to delete {item}. Reason: {e}')
 
+    @profiled
     def delete_liquid_files(self):
         files_to_delete = ["buddha-megamenu.js", "ico-select.svg", "theme.scss"]
         assets_dir = self.shopify_theme_dir / "assets"
@@ -246,7 +448,15 @@ class ThemeCommandRunner:
                 except FileNotFoundError:
                     print(f'File not found: {f}')
 
-    def remove_app_blocks(self, *, dry_run: bool = False, scrub_missing_metafields: bool = True) -> dict:
+    @profiled
+    def remove_app_blocks(
+        self,
+        *,
+        dry_run: bool = False,
+        scrub_missing_metafields: bool = True,
+        use_cache: bool = True,
+        tree: ThemeTree | None = None,
+    ) -> dict:
         """Remove hard-coded Shopify app blocks from JSON templates.
 
         This is useful when pushing a theme to a dev store that doesn't have the
@@ -257,137 +467,107 @@ class ThemeCommandRunner:
             "shopify://apps/" and prune their IDs from block_order.
           - Optionally scrub known-bad metafield dynamic sources inside
             collapsible_tab blocks for product templates.
+          - With use_cache, templates unchanged since they were last found
+            clean are skipped without being parsed.
+
+        Pass a shared `tree` (see `load_theme_tree()`) to reuse templates other
+        operations already parsed; the templates this call changed are written
+        in one batch, and other edits staged in the tree are left pending.
 
         Returns:
             Summary dict: scanned/changed/removed_app_blocks/scrubbed_metafields.
         """
+        return clean_templates_dir(
+            self.shopify_theme_dir,
+            dry_run=dry_run,
+            scrub_missing_metafields=scrub_missing_metafields,
+            use_cache=use_cache,
+            tree=tree,
+        )
+
+    @profiled
+    def remove_app_blocks_batch(
+        self,
+        root: str | Path = "previous-themes",
+        *,
+        dry_run: bool = False,
+        scrub_missing_metafields: bool = True,
+        use_cache: bool = True,
+        max_workers: int | None = None,
+    ) -> dict[str, Any]:
+        """Run `remove_app_blocks()` over every backed-up theme under `root`.
 
-        def _read_template_json(template_path: Path) -> dict[str, Any]:
-            raw = template_path.read_text(encoding="utf-8", errors="replace")
-            raw2 = _LEADING_BLOCK_COMMENT_RE.sub("", raw, count=1)
-            return json.loads(raw2)
-
-        def _write_template_json(template_path: Path, data: dict[str, Any]) -> None:
-            template_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
-
-        def _is_app_block(block: dict[str, Any]) -> bool:
-            t = (block.get("type") or "")
-            return isinstance(t, str) and t.startswith("shopify://apps/")
-
-        def _clean_template(data: dict[str, Any]) -> tuple[dict[str, Any], int]:
-            removed = 0
-            sections = data.get("sections") or {}
-            if not isinstance(sections, dict):
-                return data, 0
-            for sec in sections.values():
-                if not isinstance(sec, dict):
-                    continue
-                blocks = sec.get("blocks")
-                if not isinstance(blocks, dict):
-                    continue
+        Theme dirs are discovered by their `.shopify-theme-utils.json` manifest
+        and cleaned in parallel worker processes (one theme per task). With a
+        single theme or `max_workers=1` they are cleaned in this process.
 
-                remove_ids = [
-                    bid
-                    for bid, b in blocks.items()
-                    if isinstance(b, dict) and _is_app_block(b)
-                ]
-                for bid in remove_ids:
-                    blocks.pop(bid, None)
-                removed += len(remove_ids)
-
-                order = sec.get("block_order")
-                if isinstance(order, list) and remove_ids:
-                    remove_set = set(remove_ids)
-                    sec["block_order"] = [x for x in order if x not in remove_set]
-            return data, removed
-
-        def _scrub_missing_metafield_dynamic_sources(template_path: Path) -> bool:
-            try:
-                data = _read_template_json(template_path)
-            except Exception:
-                return False
+        On platforms that start workers with "spawn" (Windows, macOS) each
+        worker re-imports the calling script, so a script that calls this must
+        keep its top-level code under `if __name__ == "__main__":`.
 
-            changed = False
-            sections = data.get("sections") or {}
-            if not isinstance(sections, dict):
-                return False
+        Args:
+            root: Directory holding theme backups (default: ./previous-themes).
+            dry_run: If True, report changes without writing files.
+            scrub_missing_metafields: See `remove_app_blocks()`.
+            use_cache: See `remove_app_blocks()`.
+            max_workers: Process count (default: number of CPUs).
 
-            for section in sections.values():
-                if not isinstance(section, dict):
-                    continue
-                blocks = section.get("blocks")
-                if not isinstance(blocks, dict):
-                    continue
-                for block in blocks.values():
-                    if not isinstance(block, dict):
-                        continue
-                    if block.get("type") != "collapsible_tab":
-                        continue
-                    settings = block.get("settings")
-                    if not isinstance(settings, dict):
-                        continue
-                    content = settings.get("content")
-                    if not isinstance(content, str):
-                        continue
-
-                    if any(s in content for s in _BAD_DYNAMIC_SOURCE_SUBSTRS):
-                        settings["content"] = ""
-                        changed = True
-
-            if changed and not dry_run:
-                _write_template_json(template_path, data)
-            return changed
-
-        templates_dir = self.shopify_theme_dir / "templates"
-        summary = {
-            "templates_dir": str(templates_dir),
+        Returns:
+            Summary dict with per-theme summaries under `themes` and totals.
+        """
+        root_path = self._resolve_project_path(root)
+        theme_dirs = [d for d, _ in iter_backup_dirs(root_path)]
+        totals = {
             "scanned": 0,
             "changed": 0,
             "removed_app_blocks": 0,
             "scrubbed_metafields": 0,
-            "files_changed": [],
+            "skipped_unchanged": 0,
         }
+        summary: dict[str, Any] = {"root": str(root_path), "themes": [], "errors": [], "totals": totals}
 
-        if not templates_dir.exists():
-            print(f"[yellow]No templates dir found:[/yellow] {templates_dir}")
+        if not theme_dirs:
+            print(f"[yellow]No theme backups found under:[/yellow] {root_path}")
             return summary
 
-        templates = sorted(templates_dir.glob("*.json"))
-        for template_path in templates:
-            summary["scanned"] += 1
-
-            try:
-                data = _read_template_json(template_path)
-            except Exception as e:
-                print(f"[red]Skipping unreadable JSON:[/red] {template_path} ({e})")
-                continue
-
-            data2, removed = _clean_template(data)
-            changed = False
-
-            if removed:
-                summary["removed_app_blocks"] += removed
-                changed = True
-                if not dry_run:
-                    _write_template_json(template_path, data2)
-                print(f"{template_path.relative_to(self.shopify_theme_dir)}: removed {removed} app blocks")
-
-            if scrub_missing_metafields and template_path.name.startswith("product"):
-                if _scrub_missing_metafield_dynamic_sources(template_path):
-                    summary["scrubbed_metafields"] += 1
-                    changed = True
-                    msg = f"{template_path.relative_to(self.shopify_theme_dir)}: scrubbed missing-metafield dynamic sources"
-                    print(msg if not dry_run else f"(dry-run) {msg}")
-
-            if changed:
-                summary["changed"] += 1
-                summary["files_changed"].append(str(template_path))
+        # A worker process only pays off with more than one theme to spread over.
+        in_process = max_workers == 1 or len(theme_dirs) == 1
+        with (ThreadPoolExecutor(max_workers=1) if in_process else ProcessPoolExecutor(max_workers=max_workers)) as pool:
+            futures = [
+                pool.submit(
+                    clean_templates_dir,
+                    d,
+                    dry_run=dry_run,
+                    scrub_missing_metafields=scrub_missing_metafields,
+                    quiet=True,
+                    use_cache=use_cache,
+                )
+                for d in theme_dirs
+            ]
+            for theme_dir, fut in zip(theme_dirs, futures):
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    summary["errors"].append({"path": str(theme_dir), "error": str(e)})
+                    print(f"[red]Failed to clean {theme_dir}:[/red] {e}")
+                    continue
+                summary["themes"].append({"path": str(theme_dir), **result})
+                for k in totals:
+                    totals[k] += result[k]
+                prefix = "(dry-run) " if dry_run else ""
+                print(
+                    f"{prefix}{theme_dir.name}: {result['changed']}/{result['scanned']} templates changed, "
+                    f"removed {result['removed_app_blocks']} app blocks"
+                )
 
-        print(f"Processed {len(templates)} templates in {templates_dir}")
+        print(
+            f"Processed {totals['scanned']} templates across {len(summary['themes'])} themes in {root_path} "
+            f"({totals['changed']} changed)"
+        )
         return summary
 
-    def _theme_list_json(self) -> list[dict[str, Any]]:
-        """Return themes from `shopify theme list --json`.
+    def _theme_list_json(self, store: str | None = None) -> list[dict[str, Any]]:
+        """Return themes from `shopify theme list --json` (for `store`, default this runner's).
 
         Shopify CLI output format has varied between versions. This function
         tolerates both a top-level list and a dict with a `themes` key.
@@ -397,7 +577,7 @@ class ThemeCommandRunner:
             "theme",
             "list",
             "--store",
-            self.store_shortname,
+            store or self.store_shortname,
             "--json",
         ]
         proc = subprocess.run(command, capture_output=True, text=True)
@@ -408,7 +588,7 @@ class ThemeCommandRunner:
         start = min([i for i in (stdout.find("["), stdout.find("{")) if i != -1], default=-1)
         if start == -1:
             raise ValueError("Unexpected JSON output from shopify theme list")
-        payload = json.loads(stdout[start:])
+        payload = json_codec.loads(stdout[start:])
 
         if isinstance(payload, dict) and "themes" in payload:
             themes = payload["themes"]
@@ -479,57 +659,149 @@ class ThemeCommandRunner:
         s2 = "".join(ch for ch in s if ch.isdigit())
         return s2
 
-    def download_previous_themes(
+    @staticmethod
+    def _remote_updated_at(theme: dict[str, Any]) -> str | None:
+        """The theme's `updated_at` as reported by `shopify theme list --json`."""
+        for key in ("updated_at", "updatedAt"):
+            v = theme.get(key)
+            if isinstance(v, str) and v.strip():
+                return v.strip()
+        return None
+
+    @staticmethod
+    def _backup_state(theme_dir: Path, theme_id: Any, remote_updated_at: str | None = None) -> str:
+        """Compare a backup dir against the remote theme.
+
+        Returns:
+            "missing" if `theme_dir` holds no backup of `theme_id`, "stale" if the
+            remote theme was updated after the backup was taken, else "fresh".
+            Without a remote timestamp any backup of the same id counts as fresh.
+            Manifests written before `remote_updated_at` was recorded are
+            compared against their `downloaded_at` instead.
+        """
+        data = read_manifest(theme_dir)
+        if data is None or str(data.get("theme_id")) != str(theme_id):
+            return "missing"
+        remote = parse_manifest_ts(remote_updated_at)
+        if remote is None:
+            return "fresh"
+        captured = parse_manifest_ts(data.get("remote_updated_at") or data.get("downloaded_at"))
+        if captured is None or remote > captured:
+            return "stale"
+        return "fresh"
+
+    @classmethod
+    def _already_downloaded(cls, theme_dir: Path, theme_id: Any, remote_updated_at: str | None = None) -> bool:
+        return cls._backup_state(theme_dir, theme_id, remote_updated_at) == "fresh"
+
+    def _write_backup_manifest(self, theme_dir: Path, theme: dict[str, Any]) -> None:
+        payload = {
+            "theme_id": theme.get("id"),
+            "title": theme.get("name") or theme.get("title"),
+            "role": theme.get("role"),
+            "store": self.store_shortname,
+            "downloaded_at": datetime.now(timezone.utc).isoformat(),
+            # What the remote theme looked like when pulled; see `_backup_state()`.
+            "remote_updated_at": self._remote_updated_at(theme),
+        }
+        (theme_dir / MANIFEST_NAME).write_text(json_codec.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+    def _pull_theme_to_dir(self, theme_id: Any, theme_dir: Path) -> None:
+        """`shopify theme pull` a theme by id into `theme_dir`. Raises RuntimeError on failure."""
+        theme_dir.mkdir(parents=True, exist_ok=True)
+        command = [
+            self.shopify_cli_executable,
+            "theme",
+            "pull",
+            "--theme",
+            str(theme_id),
+            "--store",
+            self.store_shortname,
+            "--path",
+            str(theme_dir),
+        ]
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode != 0:
+            err = proc.stderr.strip() or proc.stdout.strip() or "theme pull failed"
+            raise RuntimeError(err)
+
+    def _push_dir(
         self,
-        count: int | None = None,
+        theme_dir: Path,
         *,
-        dest_dir: str | Path = "previous-themes",
-        include_live: bool | None = None,
-        allow_live: bool | None = None,
-        continue_on_error: bool = True,
-        skip_if_downloaded: bool = True,
-        theme_names: list[str | int] | None = None,
-        allow_pull_by_id_not_listed: bool = True,
+        store: str | None = None,
+        theme: str | None = None,
+        unpublished: bool = False,
     ) -> dict[str, Any]:
-        """Download themes into `previous-themes/<title>/`.
-
-        If `theme_names` is provided, downloads those themes (by name/title or id)
-        instead of using the most-recent `count` selection.
+        """`shopify theme push` an arbitrary theme dir. Raises RuntimeError on failure.
 
         Args:
-            count: Number of themes to download (most recent first). If None,
-                downloads all eligible themes.
-            dest_dir: Output directory (default: ./previous-themes).
-            include_live: If True, include the live theme in candidates.
-            allow_live: Explicit consent to download live theme (extra guardrail).
-            continue_on_error: If True, keep going when a theme pull fails.
-            skip_if_downloaded: If True, skip themes that appear to already be
-                downloaded (based on a manifest file in the destination dir).
-            theme_names: Optional list of theme names/titles to download.
-                Matching is case-insensitive and compares against the theme's
-                `name` or `title` as returned by `shopify theme list --json`.
-            allow_pull_by_id_not_listed: If True and `theme_names` contains numeric
-                IDs that aren't present in `shopify theme list --json`, attempt to
-                pull them anyway by id. This helps when CLI list output is filtered
-                by permissions or other factors.
+            theme_dir: Directory to push (passed as --path).
+            store: Target store (default: this runner's store).
+            theme: Theme id or name to push to (with unpublished=True, the new theme's name).
+            unpublished: Create a new unpublished theme.
 
         Returns:
-            Summary dict with downloaded themes and any errors.
+            The CLI's JSON output if it could be parsed, else {}.
         """
-        if count is not None and int(count) <= 0:
-            raise ValueError("count must be a positive integer or None")
-        count_int = int(count) if count is not None else None
+        command = [self.shopify_cli_executable, "theme", "push", "--path", str(theme_dir)]
+        if unpublished:
+            command.append("--unpublished")
+        if theme:
+            command += ["--theme", str(theme)]
+        command += ["--store", store or self.store_shortname, "--json"]
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode != 0:
+            err = proc.stderr.strip() or proc.stdout.strip() or "theme push failed"
+            raise RuntimeError(err)
+        stdout = (proc.stdout or "").strip()
+        start = min([i for i in (stdout.find("["), stdout.find("{")) if i != -1], default=-1)
+        try:
+            payload = json_codec.loads(stdout[start:]) if start != -1 else {}
+        except ValueError:
+            payload = {}
+        return payload if isinstance(payload, dict) else {}
+
+    def _resolve_project_path(self, path: str | Path) -> Path:
+        """Resolve `path` relative to the *project root* (parent of theme_files)
+        so backups don't get nested inside theme_files."""
+        p = Path(path)
+        return p if p.is_absolute() else self.project_root_dir / p
+
+    def _select_themes(
+        self,
+        count_int: int | None,
+        *,
+        include_live: bool,
+        effective_allow_live: bool,
+        theme_names: list[str | int] | None = None,
+        allow_pull_by_id_not_listed: bool = True,
+        use_inventory: bool = False,
+    ) -> dict[str, Any]:
+        """Theme selection shared by `download_previous_themes()` and the restore pipeline.
 
-        effective_allow_live = self.allow_live if allow_live is None else allow_live
-        if include_live is None:
-            include_live = False
+        With `use_inventory`, themes and the live theme come from the local
+        inventory (as of the store's last `refresh_inventory()`) instead of the CLI.
 
-        themes = self._theme_list_json()
+        Returns:
+            Dict with `selected` themes (most recent first), `explicit_id_fallbacks`
+            (requested numeric ids not in the theme list) and the detected `live_id`.
+        """
         live_id = None
-        try:
-            live_id = self._get_live_theme_id()
-        except Exception:
-            pass
+        if use_inventory:
+            with self.open_inventory() as inv:
+                if inv.refreshed_at(self.store_shortname) is None:
+                    raise ValueError(
+                        f"store {self.store_shortname} is not in the theme inventory; run refresh_inventory() first"
+                    )
+                themes = inv.themes(self.store_shortname)
+            live_id = next((t["id"] for t in themes if t.get("role") == "live"), None)
+        else:
+            themes = self._theme_list_json()
+            try:
+                live_id = self._get_live_theme_id()
+            except Exception:
+                pass
 
         live_id_norm = self._normalize_theme_id(live_id) if live_id is not None else ""
 
@@ -624,13 +896,73 @@ class ThemeCommandRunner:
                 if count_int is not None and len(selected) >= count_int:
                     break
 
-        # Resolve destination relative to the *project root* (parent of theme_files)
-        # so backups don't get nested inside theme_files.
-        dest_path = Path(dest_dir)
-        if not dest_path.is_absolute():
-            out_base = self.project_root_dir / dest_path
-        else:
-            out_base = dest_path
+        return {"selected": selected, "explicit_id_fallbacks": explicit_id_fallbacks, "live_id": live_id}
+
+    @profiled
+    def download_previous_themes(
+        self,
+        count: int | None = None,
+        *,
+        dest_dir: str | Path = "previous-themes",
+        include_live: bool | None = None,
+        allow_live: bool | None = None,
+        continue_on_error: bool = True,
+        skip_if_downloaded: bool = True,
+        theme_names: list[str | int] | None = None,
+        allow_pull_by_id_not_listed: bool = True,
+        use_inventory: bool = False,
+    ) -> dict[str, Any]:
+        """Download themes into `previous-themes/<title>/`.
+
+        If `theme_names` is provided, downloads those themes (by name/title or id)
+        instead of using the most-recent `count` selection.
+
+        Args:
+            count: Number of themes to download (most recent first). If None,
+                downloads all eligible themes.
+            dest_dir: Output directory (default: ./previous-themes).
+            include_live: If True, include the live theme in candidates.
+            allow_live: Explicit consent to download live theme (extra guardrail).
+            continue_on_error: If True, keep going when a theme pull fails.
+            skip_if_downloaded: If True, skip themes that are already backed up
+                in the destination dir (per its manifest) and haven't been
+                updated remotely since (theme list `updated_at` vs the
+                `remote_updated_at` recorded in the manifest).
+            theme_names: Optional list of theme names/titles to download.
+                Matching is case-insensitive and compares against the theme's
+                `name` or `title` as returned by `shopify theme list --json`.
+            allow_pull_by_id_not_listed: If True and `theme_names` contains numeric
+                IDs that aren't present in `shopify theme list --json`, attempt to
+                pull them anyway by id. This helps when CLI list output is filtered
+                by permissions or other factors.
+            use_inventory: Select themes from the local theme inventory instead
+                of calling `shopify theme list` (see `refresh_inventory()`).
+
+        Returns:
+            Summary dict with downloaded themes (`refreshed` lists those pulled
+            again because their backup was stale) and any errors.
+        """
+        if count is not None and int(count) <= 0:
+            raise ValueError("count must be a positive integer or None")
+        count_int = int(count) if count is not None else None
+
+        effective_allow_live = self.allow_live if allow_live is None else allow_live
+        if include_live is None:
+            include_live = False
+
+        selection = self._select_themes(
+            count_int,
+            include_live=include_live,
+            effective_allow_live=effective_allow_live,
+            theme_names=theme_names,
+            allow_pull_by_id_not_listed=allow_pull_by_id_not_listed,
+            use_inventory=use_inventory,
+        )
+        selected = selection["selected"]
+        explicit_id_fallbacks = selection["explicit_id_fallbacks"]
+        live_id = selection["live_id"]
+
+        out_base = self._resolve_project_path(dest_dir)
         out_base.mkdir(parents=True, exist_ok=True)
 
         used_names: dict[str, int] = {}
@@ -642,34 +974,11 @@ class ThemeCommandRunner:
             "selected": [],
             "downloaded": [],
             "skipped": [],
+            "refreshed": [],
             "errors": [],
             "skipped_live": False,
         }
 
-        manifest_name = ".shopify-theme-utils.json"
-
-        def _already_downloaded(theme_dir: Path, theme_id: Any) -> bool:
-            if not theme_dir.exists() or not theme_dir.is_dir():
-                return False
-            manifest_path = theme_dir / manifest_name
-            if not manifest_path.exists():
-                return False
-            try:
-                data = json.loads(manifest_path.read_text(encoding="utf-8"))
-            except Exception:
-                return False
-            return str(data.get("theme_id")) == str(theme_id)
-
-        def _write_manifest(theme_dir: Path, theme: dict[str, Any]) -> None:
-            payload = {
-                "theme_id": theme.get("id"),
-                "title": theme.get("name") or theme.get("title"),
-                "role": theme.get("role"),
-                "store": self.store_shortname,
-                "downloaded_at": datetime.now(timezone.utc).isoformat(),
-            }
-            (theme_dir / manifest_name).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
-
         for t in selected:
             tid = t.get("id")
             title = self._theme_display_name(t) or f"theme-{tid}"
@@ -695,32 +1004,20 @@ class ThemeCommandRunner:
             record = {"id": tid, "title": title, "role": role, "path": str(theme_dir)}
             summary["selected"].append(record)
 
-            if skip_if_downloaded and _already_downloaded(theme_dir, tid):
-                summary["skipped"].append({**record, "reason": "already_downloaded"})
-                print(f"Skipping already-downloaded theme {tid} -> {theme_dir} ({title})")
-                continue
-
-            theme_dir.mkdir(parents=True, exist_ok=True)
-
-            command = [
-                self.shopify_cli_executable,
-                "theme",
-                "pull",
-                "--theme",
-                str(tid),
-                "--store",
-                self.store_shortname,
-                "--path",
-                str(theme_dir),
-            ]
+            if skip_if_downloaded:
+                state = self._backup_state(theme_dir, tid, self._remote_updated_at(t))
+                if state == "fresh":
+                    summary["skipped"].append({**record, "reason": "already_downloaded"})
+                    print(f"Skipping already-downloaded theme {tid} -> {theme_dir} ({title})")
+                    continue
+                if state == "stale":
+                    summary["refreshed"].append(record)
+                    print(f"Theme {tid} ({title}) changed since it was backed up; downloading again")
 
             try:
                 print(f"Downloading theme {tid} -> {theme_dir} ({title})")
-                proc = subprocess.run(command, capture_output=True, text=True)
-                if proc.returncode != 0:
-                    err = proc.stderr.strip() or proc.stdout.strip() or "theme pull failed"
-                    raise RuntimeError(err)
-                _write_manifest(theme_dir, t)
+                self._pull_theme_to_dir(tid, theme_dir)
+                self._write_backup_manifest(theme_dir, t)
                 summary["downloaded"].append(record)
             except Exception as e:
                 summary["errors"].append({**record, "error": str(e)})
@@ -746,31 +1043,15 @@ class ThemeCommandRunner:
             record = {"id": tid_norm, "title": title, "role": None, "path": str(theme_dir)}
             summary["selected"].append(record)
 
-            if skip_if_downloaded and _already_downloaded(theme_dir, tid_norm):
+            if skip_if_downloaded and self._already_downloaded(theme_dir, tid_norm):
                 summary["skipped"].append({**record, "reason": "already_downloaded"})
                 print(f"Skipping already-downloaded theme {tid_norm} -> {theme_dir}")
                 continue
 
-            theme_dir.mkdir(parents=True, exist_ok=True)
-            command = [
-                self.shopify_cli_executable,
-                "theme",
-                "pull",
-                "--theme",
-                str(tid_norm),
-                "--store",
-                self.store_shortname,
-                "--path",
-                str(theme_dir),
-            ]
-
             try:
                 print(f"Downloading theme {tid_norm} -> {theme_dir} (id-only)")
-                proc = subprocess.run(command, capture_output=True, text=True)
-                if proc.returncode != 0:
-                    err = proc.stderr.strip() or proc.stdout.strip() or "theme pull failed"
-                    raise RuntimeError(err)
-                _write_manifest(theme_dir, {"id": tid_norm, "name": title, "role": None})
+                self._pull_theme_to_dir(tid_norm, theme_dir)
+                self._write_backup_manifest(theme_dir, {"id": tid_norm, "name": title, "role": None})
                 summary["downloaded"].append(record)
             except Exception as e:
                 summary["errors"].append({**record, "error": str(e)})
@@ -779,3 +1060,497 @@ class ThemeCommandRunner:
                     return summary
 
         return summary
+
+    @profiled
+    def restore_themes_pipeline(
+        self,
+        target_store: str,
+        count: int | None = None,
+        *,
+        theme_names: list[str | int] | None = None,
+        dest_dir: str | Path = "previous-themes",
+        include_live: bool | None = None,
+        allow_live: bool | None = None,
+        skip_if_downloaded: bool = True,
+        scrub_missing_metafields: bool = True,
+        validate: bool = True,
+        network_workers: int = 3,
+        cpu_workers: int | None = None,
+        use_inventory: bool = False,
+    ) -> dict[str, Any]:
+        """Back up themes from this store, clean them and push them to `target_store`.
+
+        Equivalent to `download_previous_themes()`, `remove_app_blocks_batch()`
+        and a push per theme, but the three stages overlap: pulls and pushes run
+        in their own bounded thread pools and cleanup runs in a process pool, so
+        one theme can be cleaned while others are being pulled or pushed. Each
+        theme is pushed as a new unpublished theme named after the source theme.
+
+        Args:
+            target_store: Store to push the cleaned themes to (e.g. a dev store).
+            count / theme_names / include_live / allow_live / use_inventory:
+                Theme selection, as in `download_previous_themes()`.
+            dest_dir: Backup directory (default: ./previous-themes).
+            skip_if_downloaded: Reuse existing backups that are still up to date
+                instead of pulling again.
+            scrub_missing_metafields: See `remove_app_blocks()`.
+            validate: Refuse to push themes whose templates fail validation.
+            network_workers: Concurrent pulls, and separately concurrent pushes.
+            cpu_workers: Cleanup processes (default: number of CPUs). With
+                `cpu_workers=1` or a single theme, cleanup runs in a thread of
+                this process instead.
+
+        On platforms that start workers with "spawn" (Windows, macOS) each
+        cleanup process re-imports the calling script, so a script that calls
+        this must keep its top-level code under `if __name__ == "__main__":`.
+
+        Returns:
+            Summary dict with `restored` themes, `errors` (with the failing stage)
+            and per-stage `stages` stats (throughput, busy time, max queue depth).
+        """
+        if count is not None and int(count) <= 0:
+            raise ValueError("count must be a positive integer or None")
+        effective_allow_live = self.allow_live if allow_live is None else allow_live
+        selection = self._select_themes(
+            int(count) if count is not None else None,
+            include_live=bool(include_live),
+            effective_allow_live=effective_allow_live,
+            theme_names=theme_names,
+            allow_pull_by_id_not_listed=False,
+            use_inventory=use_inventory,
+        )
+        live_id = selection["live_id"]
+
+        out_base = self._resolve_project_path(dest_dir)
+        out_base.mkdir(parents=True, exist_ok=True)
+
+        items: list[dict[str, Any]] = []
+        used_names: dict[str, int] = {}
+        skipped_live = False
+        for t in selection["selected"]:
+            tid = t.get("id")
+            if live_id is not None and str(tid) == str(live_id) and not effective_allow_live:
+                skipped_live = True
+                print(
+                    "[bold red]Refusing to download the live theme without explicit consent. "
+                    "Pass allow_live=True (or set allow_live on ThemeCommandRunner) to proceed.[/bold red]"
+                )
+                continue
+            title = self._theme_display_name(t) or f"theme-{tid}"
+            safe = self._safe_dirname(str(title))
+            n = used_names.get(safe, 0) + 1
+            used_names[safe] = n
+            if n > 1:
+                safe = f"{safe}-{n}"
+            items.append(
+                {
+                    "id": tid,
+                    "title": title,
+                    "path": str(out_base / safe),
+                    "theme": t,
+                    "scrub_missing_metafields": scrub_missing_metafields,
+                }
+            )
+
+        def _pull(item: dict[str, Any]) -> dict[str, Any]:
+            theme_dir = Path(item["path"])
+            if skip_if_downloaded and self._already_downloaded(
+                theme_dir, item["id"], self._remote_updated_at(item["theme"])
+            ):
+                return {**item, "pulled": False}
+            self._pull_theme_to_dir(item["id"], theme_dir)
+            self._write_backup_manifest(theme_dir, item["theme"])
+            return {**item, "pulled": True}
+
+        def _push(item: dict[str, Any]) -> dict[str, Any]:
+            if validate:
+                problems = validate_templates_dir(item["path"])["errors"]
+                if problems:
+                    first = "; ".join(f"{e['path']}: {e['message']}" for e in problems[:3])
+                    raise RuntimeError(f"{len(problems)} template problems ({first})")
+            result = self._push_dir(Path(item["path"]), store=target_store, theme=item["title"], unpublished=True)
+            return {**item, "push_result": result}
+
+        def _progress(stage: str, item: dict[str, Any]) -> None:
+            print(f"[dim]{stage}:[/dim] {item['title']} ({item['id']})")
+
+        clean_workers = cpu_workers or os.cpu_count() or 1
+        clean_kind = "thread" if clean_workers == 1 or len(items) <= 1 else "process"
+
+        print(f"Restoring {len(items)} themes from {self.store_shortname} to {target_store}")
+        run = run_pipeline(
+            items,
+            [
+                Stage("pull", _pull, workers=network_workers),
+                Stage("clean", _clean_pipeline_item, workers=clean_workers, kind=clean_kind),
+                Stage("push", _push, workers=network_workers),
+            ],
+            label=lambda item: f"{item['title']} ({item['id']})",
+            on_done=_progress,
+        )
+
+        for err in run["errors"]:
+            print(f"[red]{err['stage']} failed for {err['item']}:[/red] {err['error']}")
+        for st in run["stages"]:
+            print(
+                f"{st['stage']}: {st['completed']} ok, {st['failed']} failed, "
+                f"{st['items_per_second'] or 0} themes/s, busy {st['busy_seconds']:.1f}s, "
+                f"max queue {st['max_queue_depth']}"
+            )
+
+        restored = [
+            {
+                "id": r["id"],
+                "title": r["title"],
+                "path": r["path"],
+                "pulled": r["pulled"],
+                "removed_app_blocks": r["clean"]["removed_app_blocks"],
+                "push_result": r["push_result"],
+            }
+            for r in run["results"]
+        ]
+        return {
+            "source_store": self.store_shortname,
+            "target_store": target_store,
+            "dest_dir": str(out_base),
+            "restored": restored,
+            "errors": run["errors"],
+            "skipped_live": skipped_live,
+            "stages": run["stages"],
+            "wall_seconds": run["wall_seconds"],
+        }
+
+    @profiled
+    def restore_backups(
+        self,
+        target_store: str | None = None,
+        *,
+        root: str | Path = "previous-themes",
+        theme_names: list[str | int] | None = None,
+        source_store: str | None = None,
+        id_map: dict[str | int, str | int] | None = None,
+        allow_live: bool | None = None,
+        validate: bool = True,
+        max_workers: int = 4,
+    ) -> dict[str, Any]:
+        """Push many theme backups to `target_store` concurrently.
+
+        Backups are the manifest-tagged directories written by
+        `download_previous_themes()`. Each one is pushed with
+        `shopify theme push --path <backup>`, up to `max_workers` at a time:
+        backups whose source theme id is in `id_map` overwrite the mapped theme,
+        all others are created as new unpublished themes named after the backup.
+
+        Args:
+            target_store: Store to push to (default: this runner's store).
+            root: Directory holding theme backups (default: ./previous-themes).
+            theme_names: Only restore backups whose source theme id or title
+                matches one of these (case-insensitive).
+            source_store: Only restore backups pulled from this store.
+            id_map: Source theme id -> existing theme id in the target store to
+                overwrite. Backups that would overwrite the same theme (several
+                backups of one source id, or several ids mapped to one theme)
+                are not pushed and are reported under `errors`.
+            allow_live: Optional override for the instance's allow_live flag.
+                Overwrites mapped to the target store's live theme are refused
+                unless it is truthy.
+            validate: Refuse to push backups whose templates fail validation.
+            max_workers: Concurrent pushes.
+
+        Returns:
+            Summary dict with `restored` backups, `errors`, `skipped_live` and
+            `wall_seconds`.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        target = target_store or self.store_shortname
+        effective_allow_live = self.allow_live if allow_live is None else allow_live
+        overwrite = {
+            self._normalize_theme_id(k): self._normalize_theme_id(v) for k, v in (id_map or {}).items()
+        }
+
+        root_path = self._resolve_project_path(root)
+        wanted = wanted_ids = None
+        if theme_names is not None:
+            wanted = {str(x).strip().casefold() for x in theme_names if x is not None and str(x).strip()}
+            if not wanted:
+                raise ValueError("theme_names was provided but empty")
+            wanted_ids = {self._normalize_theme_id(x) for x in wanted} - {""}
+
+        jobs: list[dict[str, Any]] = []
+        for theme_dir, manifest in iter_backup_dirs(root_path):
+            if source_store is not None and manifest.get("store") != source_store:
+                continue
+            source_id = self._normalize_theme_id(manifest.get("theme_id"))
+            title = str(manifest.get("title") or theme_dir.name)
+            if wanted is not None and source_id not in wanted_ids and title.casefold() not in wanted:
+                continue
+            jobs.append(
+                {
+                    "id": source_id,
+                    "title": title,
+                    "path": str(theme_dir),
+                    "target_theme": overwrite.get(source_id),
+                }
+            )
+
+        summary: dict[str, Any] = {
+            "target_store": target,
+            "root": str(root_path),
+            "restored": [],
+            "errors": [],
+            "skipped_live": [],
+            "wall_seconds": 0.0,
+        }
+        if not jobs:
+            print(f"[yellow]No matching theme backups found under:[/yellow] {root_path}")
+            return summary
+
+        # Guardrail: one theme list call for the whole batch, only when something
+        # would be overwritten.
+        if not effective_allow_live and any(j["target_theme"] for j in jobs):
+            try:
+                live_id = self._normalize_theme_id(self._get_live_theme_id(store=target))
+            except Exception:
+                live_id = ""
+            if live_id:
+                for job in [j for j in jobs if j["target_theme"] == live_id]:
+                    jobs.remove(job)
+                    summary["skipped_live"].append(job)
+                    print(
+                        "[bold red]Refusing to overwrite the live theme.[/bold red]\n"
+                        f"[dim]Store:[/dim] {target}\n"
+                        f"[dim]Backup:[/dim] {job['path']}\n"
+                        f"[dim]Live theme id:[/dim] {live_id}\n"
+                        "Pass allow_live=True (or set allow_live on ThemeCommandRunner) to proceed."
+                    )
+
+        # Concurrent pushes to one theme would race; refuse every job in a conflict.
+        by_target: dict[str, list[dict[str, Any]]] = {}
+        for job in jobs:
+            if job["target_theme"]:
+                by_target.setdefault(job["target_theme"], []).append(job)
+        for target_theme, group in by_target.items():
+            if len(group) < 2:
+                continue
+            paths = ", ".join(j["path"] for j in group)
+            for job in group:
+                jobs.remove(job)
+                summary["errors"].append(
+                    {**job, "error": f"{len(group)} backups would overwrite theme {target_theme}: {paths}"}
+                )
+            print(f"[red]Not restoring {len(group)} backups that all map to theme {target_theme}:[/red] {paths}")
+
+        def _restore(job: dict[str, Any]) -> dict[str, Any]:
+            if validate:
+                problems = validate_templates_dir(job["path"])["errors"]
+                if problems:
+                    first = "; ".join(f"{e['path']}: {e['message']}" for e in problems[:3])
+                    raise RuntimeError(f"{len(problems)} template problems ({first})")
+            if job["target_theme"]:
+                result = self._push_dir(Path(job["path"]), store=target, theme=job["target_theme"])
+            else:
+                result = self._push_dir(Path(job["path"]), store=target, theme=job["title"], unpublished=True)
+            return {**job, "mode": "overwrite" if job["target_theme"] else "new", "push_result": result}
+
+        print(f"Restoring {len(jobs)} theme backups to {target} ({max_workers} at a time)")
+        wall0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_restore, job): job for job in jobs}
+            for fut in as_completed(futures):
+                job = futures[fut]
+                try:
+                    record = fut.result()
+                except Exception as e:
+                    summary["errors"].append({**job, "error": str(e)})
+                    print(f"[red]Failed to restore {job['title']} ({job['id']}):[/red] {e}")
+                    continue
+                summary["restored"].append(record)
+                print(f"[dim]restored ({record['mode']}):[/dim] {record['title']} ({record['id']})")
+        summary["wall_seconds"] = round(time.perf_counter() - wall0, 6)
+        summary["restored"].sort(key=lambda r: r["path"])
+        summary["errors"].sort(key=lambda r: r["path"])
+
+        print(
+            f"Restored {len(summary['restored'])} of {len(jobs)} backups to {target} "
+            f"in {summary['wall_seconds']:.1f}s ({len(summary['errors'])} failed)"
+        )
+        return summary
+
+    @profiled
+    def refresh_inventory(
+        self,
+        stores: list[str] | None = None,
+        *,
+        backups_root: str | Path | None = "previous-themes",
+        max_workers: int = 4,
+    ) -> dict[str, Any]:
+        """Refresh the local theme inventory for `stores` (default: this runner's store).
+
+        Runs `shopify theme list --json` for each store (up to `max_workers` at
+        a time) and syncs the results into the inventory; stores not listed are
+        left as they were. Backup manifests under `backups_root` are synced too
+        (pass None to skip).
+
+        Returns:
+            Summary dict with per-store change counts, `backups` counts and `errors`.
+        """
+        stores = list(stores) if stores is not None else [self.store_shortname]
+        summary: dict[str, Any] = {"inventory": str(self.inventory_path), "stores": {}, "backups": None, "errors": []}
+
+        # Network calls run in threads; the SQLite writes stay on this thread.
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(self._theme_list_json, store=store): store for store in stores}
+            listed: dict[str, list[dict[str, Any]]] = {}
+            for fut in as_completed(futures):
+                store = futures[fut]
+                try:
+                    listed[store] = fut.result()
+                except Exception as e:
+                    summary["errors"].append({"store": store, "error": str(e)})
+                    print(f"[red]Failed to list themes for {store}:[/red] {e}")
+
+        with self.open_inventory() as inv:
+            for store in stores:
+                if store not in listed:
+                    continue
+                counts = inv.refresh_store(store, listed[store])
+                summary["stores"][store] = counts
+                print(
+                    f"{store}: {counts['added']} added, {counts['updated']} updated, "
+                    f"{counts['removed']} removed, {counts['unchanged']} unchanged"
+                )
+            if backups_root is not None:
+                summary["backups"] = inv.refresh_backups(self._resolve_project_path(backups_root))
+        return summary
+
+    @profiled
+    def update_code_index(
+        self,
+        *,
+        backups_root: str | Path | None = "previous-themes",
+        include_theme_files: bool = True,
+    ) -> dict[str, Any]:
+        """Index Liquid/JSON/JS files of theme_files and every backup for `search_code()`.
+
+        Only files whose content changed since the last update are re-indexed;
+        backups that no longer exist are dropped from the index. Only the
+        sources being refreshed are pruned: with `backups_root=None` the
+        indexed backups are kept, and with `include_theme_files=False` the
+        indexed theme_files are kept.
+
+        Returns:
+            Counts of indexed/unchanged/removed files and the number of themes.
+        """
+        themes: dict[str, dict[str, Any]] = {}
+        backups_prefix = None
+        if include_theme_files:
+            themes["theme_files"] = {"root": self.shopify_theme_dir, "store": self.store_shortname}
+        if backups_root is not None:
+            root_path = self._resolve_project_path(backups_root)
+            backups_prefix = f"{root_path.name}/"
+            for theme_dir, manifest in iter_backup_dirs(root_path):
+                themes[f"{root_path.name}/{theme_dir.name}"] = {
+                    "root": theme_dir,
+                    "theme_id": self._normalize_theme_id(manifest.get("theme_id")) or None,
+                    "store": manifest.get("store"),
+                }
+
+        def _refreshed(label: str) -> bool:
+            if label == "theme_files":
+                return include_theme_files
+            return backups_prefix is not None and label.startswith(backups_prefix)
+
+        with CodeSearchIndex(self.code_index_path) as index:
+            counts = index.update(themes, prune=_refreshed)
+        print(
+            f"Code index: {counts['indexed']} files indexed, {counts['unchanged']} unchanged, "
+            f"{counts['removed']} removed across {len(themes)} themes"
+        )
+        return {**counts, "themes": len(themes), "index": str(self.code_index_path)}
+
+    @profiled
+    def search_code(self, query: str, **kwargs) -> list[dict[str, Any]]:
+        """Search the code index built by `update_code_index()`.
+
+        Keyword arguments are passed to `CodeSearchIndex.search()` (theme,
+        path_glob, case_sensitive, limit).
+
+        Returns:
+            Hits with theme, theme_id, store, path, line and text.
+        """
+        with CodeSearchIndex(self.code_index_path) as index:
+            return index.search(query, **kwargs)
+
+    @profiled
+    def prune_previous_themes(
+        self,
+        *,
+        dest_dir: str | Path = "previous-themes",
+        keep_last: int | None = None,
+        max_age_days: float | None = None,
+        max_total_bytes: int | None = None,
+        dry_run: bool = False,
+        wait: bool = False,
+    ) -> dict[str, Any]:
+        """Garbage-collect backups created by `download_previous_themes()`.
+
+        Only directories containing a `.shopify-theme-utils.json` manifest are
+        considered. See `retention.plan_retention()` for how the policies combine.
+
+        Args:
+            dest_dir: Backup directory (default: ./previous-themes).
+            keep_last: Keep the N most recent backups per theme id.
+            max_age_days: Evict backups downloaded more than N days ago.
+            max_total_bytes: Evict least-recently-downloaded backups until the
+                remaining backups fit this budget.
+            dry_run: If True, only report what would be deleted.
+            wait: If True, block until the background delete has finished.
+
+        Returns:
+            Summary dict with kept/deleted backups, reclaimable bytes and
+            `trash_bytes` still held by earlier, unfinished deletes.
+        """
+        if keep_last is None and max_age_days is None and max_total_bytes is None:
+            raise ValueError("at least one of keep_last, max_age_days or max_total_bytes is required")
+
+        root = self._resolve_project_path(dest_dir)
+        plan = plan_retention(
+            scan_backups(root),
+            keep_last=keep_last,
+            max_age_days=max_age_days,
+            max_total_bytes=max_total_bytes,
+        )
+
+        def _record(b: dict[str, Any]) -> dict[str, Any]:
+            ts = b.get("downloaded_at")
+            return {**b, "downloaded_at": ts.isoformat() if ts else None}
+
+        summary: dict[str, Any] = {
+            "dest_dir": str(root),
+            "dry_run": dry_run,
+            "kept": [_record(b) for b in plan["keep"]],
+            "deleted": [_record(b) for b in plan["delete"]],
+            "kept_bytes": plan["kept_bytes"],
+            "reclaimable_bytes": plan["reclaimable_bytes"],
+            # Earlier deletes that haven't finished (or were interrupted) still use disk.
+            "trash_bytes": trash_size_bytes(root),
+        }
+
+        prefix = "(dry-run) " if dry_run else ""
+        for b in plan["delete"]:
+            print(f"{prefix}Deleting backup {b['path']} ({format_bytes(b['size_bytes'])}, {b['reason']})")
+        print(
+            f"{prefix}Reclaimable: {format_bytes(plan['reclaimable_bytes'])} "
+            f"from {len(plan['delete'])} backups; keeping {len(plan['keep'])} "
+            f"({format_bytes(plan['kept_bytes'])})"
+        )
+        if summary["trash_bytes"]:
+            print(
+                f"[yellow]{format_bytes(summary['trash_bytes'])} from earlier deletes is still in "
+                f"{root / TRASH_DIRNAME}[/yellow]"
+            )
+
+        if not dry_run and plan["delete"]:
+            delete_backups(root, [b["path"] for b in plan["delete"]], wait=wait)
+        return summary
@@ -0,0 +1,270 @@
+"""Local SQLite inventory of themes across stores and of local backups.
+
+`ThemeInventory` caches what `shopify theme list --json` returned per store,
+plus the backups found under `previous-themes/` (from their manifests), so
+cross-store questions are answered with an indexed query instead of a CLI
+call per store:
+
+    inv = runner.open_inventory()
+    inv.stores_with_theme("Summer sale")
+    inv.oldest_per_store(role="unpublished")
+
+Refreshes are incremental: `refresh_store()` only rewrites rows whose
+name/role/timestamps changed and drops themes no longer listed for that store;
+`refresh_backups()` only re-reads manifests whose mtime changed. Timestamps
+are stored as UTC ISO strings so they sort and compare as text.
+
+A connection must be used from the thread that opened it.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+from shopify_theme_utils.manifest import MANIFEST_NAME, iter_backup_dirs, parse_manifest_ts
+
+INVENTORY_NAME = ".shopify-theme-utils-inventory.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stores (
+    store TEXT PRIMARY KEY,
+    refreshed_at TEXT NOT NULL,
+    theme_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS themes (
+    store TEXT NOT NULL,
+    theme_id TEXT NOT NULL,
+    name TEXT,
+    role TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (store, theme_id)
+);
+CREATE INDEX IF NOT EXISTS themes_name ON themes (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS themes_store_role_updated ON themes (store, role, updated_at);
+CREATE TABLE IF NOT EXISTS backups (
+    path TEXT PRIMARY KEY,
+    store TEXT,
+    theme_id TEXT,
+    title TEXT,
+    downloaded_at TEXT,
+    remote_updated_at TEXT,
+    manifest_mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backups_store_theme ON backups (store, theme_id);
+"""
+
+
+def _ts(value: Any) -> str | None:
+    dt = parse_manifest_ts(value)
+    return dt.astimezone(timezone.utc).isoformat() if dt is not None else None
+
+
+def _theme_ts(theme: dict[str, Any], *keys: str) -> str | None:
+    for key in keys:
+        ts = _ts(theme.get(key))
+        if ts is not None:
+            return ts
+    return None
+
+
+def _theme_id(value: Any) -> str:
+    return "".join(ch for ch in str(value if value is not None else "") if ch.isdigit())
+
+
+class ThemeInventory:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.row_factory = sqlite3.Row
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{self.path} has inventory schema {version}, expected {SCHEMA_VERSION}")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ThemeInventory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def refresh_store(self, store: str, themes: Iterable[dict[str, Any]]) -> dict[str, int]:
+        """Replace the inventory of `store` with `themes` (a theme list payload).
+
+        Returns:
+            Counts of added/updated/unchanged/removed themes.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        incoming: dict[str, tuple] = {}
+        for t in themes:
+            tid = _theme_id(t.get("id"))
+            if not tid:
+                continue
+            name = t.get("name") or t.get("title")
+            incoming[tid] = (
+                name.strip() if isinstance(name, str) else None,
+                t.get("role"),
+                _theme_ts(t, "created_at", "createdAt"),
+                _theme_ts(t, "updated_at", "updatedAt"),
+            )
+
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        with self._conn:
+            existing = {
+                row["theme_id"]: (row["name"], row["role"], row["created_at"], row["updated_at"])
+                for row in self._conn.execute(
+                    "SELECT theme_id, name, role, created_at, updated_at FROM themes WHERE store = ?", (store,)
+                )
+            }
+            changed = []
+            for tid, values in incoming.items():
+                old = existing.get(tid)
+                if old == values:
+                    counts["unchanged"] += 1
+                    continue
+                counts["added" if old is None else "updated"] += 1
+                changed.append((store, tid, *values, now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO themes (store, theme_id, name, role, created_at, updated_at, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                changed,
+            )
+            gone = [(store, tid) for tid in existing if tid not in incoming]
+            self._conn.executemany("DELETE FROM themes WHERE store = ? AND theme_id = ?", gone)
+            counts["removed"] = len(gone)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stores (store, refreshed_at, theme_count) VALUES (?, ?, ?)",
+                (store, now, len(incoming)),
+            )
+        return counts
+
+    def refresh_backups(self, root: str | Path) -> dict[str, int]:
+        """Sync the backups table with the manifest-tagged dirs directly under `root`.
+
+        Returns:
+            Counts of updated/unchanged/removed backups.
+        """
+        root = Path(root).resolve()
+        known = {
+            row["path"]: row["manifest_mtime_ns"]
+            for row in self._conn.execute("SELECT path, manifest_mtime_ns FROM backups")
+            if Path(row["path"]).parent == root
+        }
+        counts = {"updated": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        changed = []
+        for theme_dir, manifest in iter_backup_dirs(root):
+            path = str(theme_dir)
+            seen.add(path)
+            try:
+                mtime_ns = os.stat(theme_dir / MANIFEST_NAME).st_mtime_ns
+            except OSError:
+                continue
+            if known.get(path) == mtime_ns:
+                counts["unchanged"] += 1
+                continue
+            counts["updated"] += 1
+            changed.append(
+                (
+                    path,
+                    manifest.get("store"),
+                    _theme_id(manifest.get("theme_id")) or None,
+                    manifest.get("title"),
+                    _ts(manifest.get("downloaded_at")),
+                    _ts(manifest.get("remote_updated_at")),
+                    mtime_ns,
+                )
+            )
+        gone = [(p,) for p in known if p not in seen]
+        counts["removed"] = len(gone)
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO backups VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+            self._conn.executemany("DELETE FROM backups WHERE path = ?", gone)
+        return counts
+
+    def stores(self) -> list[dict[str, Any]]:
+        """Known stores with their last refresh time and theme count."""
+        return [dict(r) for r in self._conn.execute("SELECT * FROM stores ORDER BY store")]
+
+    def refreshed_at(self, store: str) -> str | None:
+        row = self._conn.execute("SELECT refreshed_at FROM stores WHERE store = ?", (store,)).fetchone()
+        return row["refreshed_at"] if row else None
+
+    def themes(
+        self,
+        store: str | None = None,
+        *,
+        name: str | None = None,
+        role: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Themes matching all given filters (name is case-insensitive), newest first.
+
+        Each row has store/id/name/role/created_at/updated_at and `backup_path`,
+        the most recent local backup of that theme if there is one.
+        """
+        where, params = [], []
+        if store is not None:
+            where.append("t.store = ?")
+            params.append(store)
+        if name is not None:
+            where.append("t.name = ? COLLATE NOCASE")
+            params.append(name.strip())
+        if role is not None:
+            where.append("t.role = ?")
+            params.append(role)
+        sql = (
+            "SELECT t.store, t.theme_id AS id, t.name, t.role, t.created_at, t.updated_at, "
+            "(SELECT b.path FROM backups b WHERE b.store = t.store AND b.theme_id = t.theme_id "
+            " ORDER BY b.downloaded_at DESC LIMIT 1) AS backup_path "
+            "FROM themes t"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.store, t.updated_at IS NULL, t.updated_at DESC, t.theme_id"
+        return [dict(r) for r in self._conn.execute(sql, params)]
+
+    def stores_with_theme(self, name: str) -> list[str]:
+        """Stores that have a theme called `name` (case-insensitive)."""
+        rows = self._conn.execute(
+            "SELECT DISTINCT store FROM themes WHERE name = ? COLLATE NOCASE ORDER BY store", (name.strip(),)
+        )
+        return [r["store"] for r in rows]
+
+    def oldest_per_store(self, role: str | None = "unpublished") -> list[dict[str, Any]]:
+        """The least recently updated theme (optionally of `role`) in each store."""
+        cond, params = ("WHERE role = ?", (role,)) if role is not None else ("", ())
+        rows = self._conn.execute(
+            "SELECT store, theme_id AS id, name, role, created_at, updated_at FROM ("
+            "  SELECT *, ROW_NUMBER() OVER (PARTITION BY store ORDER BY updated_at IS NULL, updated_at, theme_id) AS rn"
+            f"  FROM themes {cond}"
+            ") WHERE rn = 1 ORDER BY store",
+            params,
+        )
+        return [dict(r) for r in rows]
+
+    def backups(self, store: str | None = None, theme_id: Any = None) -> list[dict[str, Any]]:
+        """Known local backups, most recently downloaded first."""
+        where, params = [], []
+        if store is not None:
+            where.append("store = ?")
+            params.append(store)
+        if theme_id is not None:
+            where.append("theme_id = ?")
+            params.append(_theme_id(theme_id))
+        sql = "SELECT path, store, theme_id, title, downloaded_at, remote_updated_at FROM backups"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY downloaded_at IS NULL, downloaded_at DESC, path"
+        return [dict(r) for r in self._conn.execute(sql, params)]
@@ -0,0 +1,228 @@
+"""In-memory view of a theme directory shared by runner operations.
+
+`ThemeTree` indexes every file with one `os.scandir` walk, parses JSON files
+lazily (at most once per tree), tracks which files were modified and writes
+only those back in `flush()`. Pass the same tree to several operations (e.g.
+`remove_app_blocks(tree=t)` then `theme_push(tree=t)`) so each file is read
+and parsed at most once per run.
+
+A tree is a snapshot: files changed on disk by something else (e.g. a
+`shopify theme pull`) after it was loaded aren't seen. Load a new tree then.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterable
+
+from shopify_theme_utils import json_codec
+
+# Shopify admin sometimes prefixes JSON templates with a /* ... */ comment header.
+# That's not valid JSON, so we strip it before parsing.
+_LEADING_BLOCK_COMMENT_RE = re.compile(r"^\s*/\*.*?\*/\s*", re.DOTALL)
+
+
+def parse_template_text(raw: str) -> Any:
+    raw2 = _LEADING_BLOCK_COMMENT_RE.sub("", raw, count=1)
+    return json_codec.loads(raw2)
+
+
+def dump_template_json(data: Any) -> str:
+    """Serialize a JSON template the way `remove_app_blocks` has always written them."""
+    return json_codec.dumps(data, indent=2) + "\n"
+
+
+class ThemeTree:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        # relpath (posix) -> (size, mtime_ns)
+        self._index: dict[str, tuple[int, int]] = {}
+        self._raw: dict[str, bytes] = {}
+        self._json: dict[str, Any] = {}
+        # relpath -> staged bytes, or None to serialize the parsed JSON on flush.
+        self._dirty: dict[str, bytes | None] = {}
+        self._deleted: set[str] = set()
+        self._digests: dict[str, str] = {}
+        self.parse_count = 0
+        # Files modified after this instant may have changed since the scan.
+        self.scanned_ns = time.time_ns()
+        self._scan()
+
+    def _scan(self) -> None:
+        stack = [(str(self.root), "")]
+        while stack:
+            path, prefix = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        rel = prefix + entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append((entry.path, rel + "/"))
+                            elif entry.is_file():
+                                st = entry.stat()
+                                self._index[rel] = (st.st_size, st.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    def path(self, rel: str) -> Path:
+        return self.root / rel
+
+    def exists(self, rel: str) -> bool:
+        if rel in self._dirty:
+            return True
+        return rel in self._index and rel not in self._deleted
+
+    def stat(self, rel: str) -> tuple[int, int]:
+        """(size, mtime_ns) as of the scan or the last flush."""
+        return self._index[rel]
+
+    def files(self, directory: str = "", suffix: str = "", *, recursive: bool = False) -> list[str]:
+        """Sorted relative paths under `directory` ending with `suffix`.
+
+        Staged files are included; files pending deletion are not.
+        """
+        prefix = f"{directory.strip('/')}/" if directory else ""
+        out = []
+        for rel in (set(self._index) - self._deleted) | set(self._dirty):
+            if not rel.startswith(prefix) or not rel.endswith(suffix):
+                continue
+            if not recursive and "/" in rel[len(prefix):]:
+                continue
+            out.append(rel)
+        return sorted(out)
+
+    def read_bytes(self, rel: str) -> bytes:
+        staged = self._dirty.get(rel)
+        if staged is not None:
+            return staged
+        if rel in self._json and rel in self._dirty:
+            return dump_template_json(self._json[rel]).encode("utf-8")
+        raw = self._raw.get(rel)
+        if raw is None:
+            raw = self.path(rel).read_bytes()
+            self._raw[rel] = raw
+        return raw
+
+    def digest(self, rel: str) -> str:
+        """sha256 of the file content on disk (or as last flushed)."""
+        d = self._digests.get(rel)
+        if d is None:
+            d = hashlib.sha256(self.read_bytes(rel)).hexdigest()
+            self._digests[rel] = d
+        return d
+
+    def read_text(self, rel: str) -> str:
+        return self.read_bytes(rel).decode("utf-8", errors="replace")
+
+    def read_json(self, rel: str) -> Any:
+        """Parse `rel` (stripping a leading /* */ header) on first use and cache it.
+
+        The returned object is shared; after mutating it call `mark_dirty(rel)`.
+        """
+        if rel in self._json:
+            return self._json[rel]
+        data = parse_template_text(self.read_text(rel))
+        self.parse_count += 1
+        self._json[rel] = data
+        # The parsed form is authoritative from now on; drop the raw copy.
+        self._raw.pop(rel, None)
+        return data
+
+    def mark_dirty(self, rel: str) -> None:
+        """Schedule the (mutated) parsed JSON for `rel` to be written on flush."""
+        if rel not in self._json:
+            raise KeyError(f"{rel} has not been parsed")
+        self._dirty[rel] = None
+        self._deleted.discard(rel)
+        self._digests.pop(rel, None)
+
+    def set_json(self, rel: str, data: Any) -> None:
+        self._json[rel] = data
+        self.mark_dirty(rel)
+
+    def write_text(self, rel: str, text: str) -> None:
+        self.write_bytes(rel, text.encode("utf-8"))
+
+    def write_bytes(self, rel: str, data: bytes) -> None:
+        self._json.pop(rel, None)
+        self._raw.pop(rel, None)
+        self._dirty[rel] = data
+        self._deleted.discard(rel)
+        self._digests.pop(rel, None)
+
+    def delete(self, rel: str) -> None:
+        self._dirty.pop(rel, None)
+        self._json.pop(rel, None)
+        self._raw.pop(rel, None)
+        self._digests.pop(rel, None)
+        if rel in self._index:
+            self._deleted.add(rel)
+
+    @property
+    def dirty(self) -> list[str]:
+        return sorted(self._dirty)
+
+    def flush(self, paths: Iterable[str] | None = None) -> dict[str, bytes]:
+        """Write dirty files, then apply deletions.
+
+        With `paths`, only those files are written (or deleted); other staged
+        edits stay pending. Operations handed a shared tree use this so they
+        never write edits staged by someone else.
+
+        Every file is first written to a temp file next to its target; only once
+        all of them are staged are they moved into place with `os.replace`, so a
+        serialization or disk error while staging leaves the theme untouched. If
+        a move itself fails, files already moved stay written (and clean), the
+        rest stay dirty, the remaining temp files are removed and the error is
+        re-raised.
+
+        Returns:
+            relpath -> bytes written.
+        """
+        wanted = None if paths is None else set(paths)
+        payloads: dict[str, bytes] = {}
+        for rel, staged in self._dirty.items():
+            if wanted is not None and rel not in wanted:
+                continue
+            payloads[rel] = staged if staged is not None else dump_template_json(self._json[rel]).encode("utf-8")
+
+        tmp_paths: dict[str, Path] = {}
+        try:
+            for rel, data in payloads.items():
+                target = self.path(rel)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}.tmp")
+                tmp.write_bytes(data)
+                tmp_paths[rel] = tmp
+        except BaseException:
+            for tmp in tmp_paths.values():
+                tmp.unlink(missing_ok=True)
+            raise
+
+        pending = dict(tmp_paths)
+        try:
+            for rel, tmp in tmp_paths.items():
+                os.replace(tmp, self.path(rel))
+                del pending[rel]
+                self._dirty.pop(rel, None)
+                st = self.path(rel).stat()
+                self._index[rel] = (st.st_size, st.st_mtime_ns)
+                self._digests[rel] = hashlib.sha256(payloads[rel]).hexdigest()
+        except BaseException:
+            for tmp in pending.values():
+                tmp.unlink(missing_ok=True)
+            raise
+
+        for rel in sorted(self._deleted if wanted is None else self._deleted & wanted):
+            self.path(rel).unlink(missing_ok=True)
+            self._index.pop(rel, None)
+            self._deleted.discard(rel)
+        return payloads
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+
+from shopify_theme_utils.code_search import CodeSearchIndex
+from shopify_theme_utils.manifest import MANIFEST_NAME
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def _write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_index_updates_only_changed_files_and_finds_lines(tmp_path):
+    root = tmp_path / "theme"
+    old = 1_600_000_000_000_000_000
+    _write(root / "sections" / "main.liquid", "<div>\n  {% render 'product-badge' %}\n</div>\n", old)
+    _write(root / "snippets" / "price.liquid", "{{ product.price | Money_With_Currency }}\n", old)
+    _write(root / "assets" / "app.js", "console.log('hi')\n", old)
+    _write(root / "assets" / "logo.png", "render 'product-badge'", old)
+    _write(root / ".shopify" / "x.json", "render 'product-badge'", old)
+
+    with CodeSearchIndex(tmp_path / "idx.sqlite") as index:
+        themes = {"theme": {"root": root, "theme_id": "1", "store": "s"}}
+        assert index.update(themes)["indexed"] == 3
+        assert index.update(themes) == {"indexed": 0, "unchanged": 3, "removed": 0, "removed_themes": 0}
+
+        hits = index.search("render 'product-badge'")
+        assert [(h["path"], h["line"], h["text"]) for h in hits] == [
+            ("sections/main.liquid", 2, "{% render 'product-badge' %}")
+        ]
+        assert hits[0]["theme_id"] == "1"
+        assert [h["path"] for h in index.search("money_with_currency")] == ["snippets/price.liquid"]
+        assert index.search("money_with_currency", case_sensitive=True) == []
+        assert [h["path"] for h in index.search("{{")] == ["snippets/price.liquid"]
+        assert index.search("hi", path_glob="sections/*") == []
+
+        # Touched but identical content is not re-indexed; edited and deleted files are.
+        os.utime(root / "assets" / "app.js", ns=(old + 1, old + 1))
+        _write(root / "sections" / "main.liquid", "<div></div>\n", old + 2)
+        (root / "snippets" / "price.liquid").unlink()
+        assert index.update(themes) == {"indexed": 1, "unchanged": 1, "removed": 1, "removed_themes": 0}
+        assert index.search("product-badge") == []
+
+        assert index.update({})["removed_themes"] == 1
+        assert index.themes() == []
+
+
+def test_runner_indexes_theme_files_and_backups(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    _write(tmp_path / "theme_files" / "templates" / "index.json", '{"type": "shopify://apps/reviews/blocks/stars"}\n')
+    backup = tmp_path / "previous-themes" / "Summer"
+    _write(backup / "templates" / "product.json", '{\n  "type": "shopify://apps/reviews/blocks/stars"\n}\n')
+    _write(backup / MANIFEST_NAME, json.dumps({"theme_id": 42, "store": "prod", "title": "Summer"}))
+
+    summary = runner.update_code_index()
+    assert summary["indexed"] == 2 and summary["themes"] == 2
+
+    hits = runner.search_code("apps/reviews")
+    assert [(h["theme"], h["theme_id"], h["path"], h["line"]) for h in hits] == [
+        ("previous-themes/Summer", "42", "templates/product.json", 2),
+        ("theme_files", None, "templates/index.json", 1),
+    ]
+    assert len(runner.search_code("apps/reviews", theme="theme_files")) == 1
+
+
+def test_partial_refresh_keeps_other_sources(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    _write(tmp_path / "theme_files" / "templates" / "index.json", "{}\n")
+    backup = tmp_path / "previous-themes" / "Summer"
+    _write(backup / "templates" / "product.json", "{}\n")
+    _write(backup / MANIFEST_NAME, json.dumps({"theme_id": 42}))
+    runner.update_code_index()
+
+    assert runner.update_code_index(backups_root=None)["removed"] == 0
+    assert runner.update_code_index(include_theme_files=False)["removed"] == 0
+    with CodeSearchIndex(runner.code_index_path) as index:
+        assert [t["theme"] for t in index.themes()] == ["previous-themes/Summer", "theme_files"]
+
+    shutil.rmtree(backup)
+    assert runner.update_code_index(include_theme_files=False)["removed_themes"] == 1
+    with CodeSearchIndex(runner.code_index_path) as index:
+        assert [t["theme"] for t in index.themes()] == ["theme_files"]
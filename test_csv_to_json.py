@@ -0,0 +1,120 @@
+import csv
+import json
+
+from shopify_theme_utils.csv_shards import fnv1a_32, shard_rows
+from shopify_theme_utils import theme_command_runner
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+DATA = {f"sku-{i:03d}": {"sku": f"sku-{i:03d}", "title": f"Product {i}" * 3} for i in range(200)}
+
+
+def test_fnv1a_32_known_vectors():
+    assert fnv1a_32("") == 0x811C9DC5
+    assert fnv1a_32("a") == 0xE40C292C
+
+
+def test_hash_shards_fit_budget_and_cover_all_rows():
+    shards, index = shard_rows(DATA, 4000, strategy="hash")
+
+    assert index["shard_count"] == len(shards) > 1
+    for i, shard in enumerate(shards):
+        assert len(json.dumps(shard, indent=4).encode("utf-8")) <= 4000
+        assert all(fnv1a_32(k) % len(shards) == i for k in shard)
+    assert sum(len(s) for s in shards) == len(DATA)
+
+
+def test_range_shards_are_sorted_and_bounded():
+    shards, index = shard_rows(DATA, 4000, strategy="range")
+
+    for shard, bounds in zip(shards, index["bounds"]):
+        assert len(json.dumps(shard, indent=4).encode("utf-8")) <= 4000
+        assert (bounds["first"], bounds["last"]) == (min(shard), max(shard))
+    assert [k for s in shards for k in s] == sorted(DATA)
+
+
+def test_single_row_over_budget_raises():
+    try:
+        shard_rows(DATA, 50)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_csv_to_json_sharded_writes_index_and_removes_only_indexed_stale_shards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    assets = runner.shopify_theme_dir / "assets"
+    assets.mkdir()
+    with open(assets / "products.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["sku", "title"])
+        writer.writeheader()
+        writer.writerows(DATA.values())
+    (assets / "products-99.json").write_text("{}", encoding="utf-8")
+    (assets / "products-2024.json").write_text("{}", encoding="utf-8")
+    (assets / "products-index.json").write_text(
+        json.dumps({"version": 1, "strategy": "hash", "shards": ["products-99.json"]}), encoding="utf-8"
+    )
+
+    summary = runner.csv_to_json("products.csv", "products.json", "sku", shard_max_bytes=4000, shard_by="range")
+
+    index = json.loads((assets / "products-index.json").read_text(encoding="utf-8"))
+    assert index["key"] == "sku" and index["strategy"] == "range"
+    assert [s["file"] for s in index["shards"]] == [s["file"] for s in summary["shards"]]
+    assert not (assets / "products-99.json").exists()
+    assert (assets / "products-2024.json").exists()
+    merged = {}
+    for s in index["shards"]:
+        merged.update(json.loads((assets / s["file"]).read_text(encoding="utf-8")))
+    assert merged == DATA
+
+
+def _write_csv(assets):
+    assets.mkdir(exist_ok=True)
+    with open(assets / "products.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["sku", "title"])
+        writer.writeheader()
+        writer.writerows(DATA.values())
+
+
+def test_csv_to_json_without_tree_does_not_index_the_theme(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _write_csv(runner.shopify_theme_dir / "assets")
+
+    def no_tree(*args, **kwargs):
+        raise AssertionError("csv_to_json should not build a ThemeTree")
+
+    monkeypatch.setattr(theme_command_runner, "ThemeTree", no_tree)
+    runner.csv_to_json("products.csv", "products.json", "sku")
+
+    out = runner.shopify_theme_dir / "assets" / "products.json"
+    assert json.loads(out.read_text(encoding="utf-8")) == DATA
+
+
+def test_csv_to_json_with_tree_stages_output_without_flushing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _write_csv(runner.shopify_theme_dir / "assets")
+    (runner.shopify_theme_dir / "layout").mkdir()
+    (runner.shopify_theme_dir / "layout" / "theme.liquid").write_text("old", encoding="utf-8")
+    tree = runner.load_theme_tree()
+    tree.write_text("layout/theme.liquid", "pending edit")
+
+    runner.csv_to_json("products.csv", "products.json", "sku", tree=tree)
+
+    assert not (runner.shopify_theme_dir / "assets" / "products.json").exists()
+    assert (runner.shopify_theme_dir / "layout" / "theme.liquid").read_text(encoding="utf-8") == "old"
+    assert tree.dirty == ["assets/products.json", "layout/theme.liquid"]
+
+
+def test_csv_to_json_translates_crlf_in_quoted_fields_like_open(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    assets = runner.shopify_theme_dir / "assets"
+    assets.mkdir()
+    (assets / "notes.csv").write_bytes(b'k,v\r\n1,"a\r\nb"\r\n')
+
+    runner.csv_to_json("notes.csv", "notes.json", "k")
+
+    assert json.loads((assets / "notes.json").read_text(encoding="utf-8")) == {"1": {"k": "1", "v": "a\nb"}}
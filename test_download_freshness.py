@@ -0,0 +1,49 @@
+import json
+
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def test_backup_state_uses_recorded_remote_updated_at(tmp_path):
+    theme_dir = tmp_path / "My Theme"
+    theme_dir.mkdir()
+    manifest = theme_dir / ".shopify-theme-utils.json"
+    manifest.write_text(json.dumps({"theme_id": 123, "remote_updated_at": "2025-01-02T00:00:00Z"}), encoding="utf-8")
+
+    state = ThemeCommandRunner._backup_state
+    assert state(tmp_path / "missing", 123) == "missing"
+    assert state(theme_dir, 124, "2025-01-01T00:00:00Z") == "missing"
+    assert state(theme_dir, 123) == "fresh"
+    assert state(theme_dir, 123, "2025-01-02T00:00:00Z") == "fresh"
+    assert state(theme_dir, 123, "2025-01-02T00:00:01Z") == "stale"
+
+    # Older manifests only have downloaded_at.
+    manifest.write_text(json.dumps({"theme_id": 123, "downloaded_at": "2025-01-05T00:00:00+00:00"}), encoding="utf-8")
+    assert state(theme_dir, 123, "2025-01-04T00:00:00Z") == "fresh"
+    assert state(theme_dir, 123, "2025-01-06T00:00:00Z") == "stale"
+
+
+def test_download_previous_themes_repulls_only_changed_themes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    themes = [
+        {"id": 1, "name": "Summer", "role": "unpublished", "updated_at": "2025-01-01T00:00:00Z"},
+        {"id": 2, "name": "Winter", "role": "unpublished", "updated_at": "2025-01-01T00:00:00Z"},
+    ]
+    list_calls = []
+    monkeypatch.setattr(runner, "_theme_list_json", lambda: list_calls.append(1) or themes)
+    monkeypatch.setattr(runner, "_get_live_theme_id", lambda: None)
+    pulled = []
+    monkeypatch.setattr(runner, "_pull_theme_to_dir", lambda tid, d: pulled.append(tid) or d.mkdir(parents=True, exist_ok=True))
+
+    runner.download_previous_themes()
+    assert sorted(pulled) == [1, 2]
+    manifest = json.loads((tmp_path / "previous-themes" / "Summer" / ".shopify-theme-utils.json").read_text())
+    assert manifest["remote_updated_at"] == "2025-01-01T00:00:00Z"
+
+    pulled.clear()
+    themes[1] = {**themes[1], "updated_at": "2025-02-01T00:00:00Z"}
+    summary = runner.download_previous_themes()
+    assert pulled == [2]
+    assert [r["id"] for r in summary["refreshed"]] == [2]
+    assert [r["id"] for r in summary["skipped"]] == [1]
+    assert len(list_calls) == 2
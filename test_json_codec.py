@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from shopify_theme_utils import json_codec
+
+SAMPLES = [
+    {"sections": {"main": {"type": "main-product", "settings": {"ratio": 1.5, "open": True}}}, "order": ["main"]},
+    {"title": "Édition limitée – 限定", "emoji": "\U0001f600", "del": "\x7f", "ctrl": "\x00\x1f"},
+    {"escapes": ["a\\xe9b", "\\\\x41", "\\U0001F600", "quote \" and slash /", "\\"]},
+    {"floats": [0.1, 1e16, 1e-7, 0.00001, 0.0001, 123456789.125, -0.0, 2.5e-300]},
+    {"ints": [0, -1, 2**63 - 1, 2**70], "nested": [[[[{"deep": [1, [2, [3]]]}]]]], "empty": [{}, []]},
+    {"settings": {"background": "#1e1e1e", "size": "2em", "spacing": "0.1em", "ratio": 0.75}},
+    {"non_finite": [float("nan"), float("inf"), -float("inf")]},
+    [],
+    "plain string",
+    1e-05,
+]
+
+
+@pytest.mark.parametrize("indent", [None, 1, 2, 3, 4])
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_dumps_matches_stdlib(obj, indent):
+    assert json_codec.dumps(obj, indent=indent) == json.dumps(obj, indent=indent)
+
+
+@pytest.mark.parametrize("indent", [None, 2, 4])
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_orjson_backend_matches_stdlib(obj, indent):
+    pytest.importorskip("orjson")
+    assert json_codec.dumps(obj, indent=indent, backend="orjson") == json.dumps(obj, indent=indent)
+
+
+def test_orjson_backend_falls_back_for_non_str_keys():
+    pytest.importorskip("orjson")
+    obj = {1: "a", "b": None}
+    assert json_codec.dumps(obj, indent=2, backend="orjson") == json.dumps(obj, indent=2)
+
+
+def test_forcing_missing_orjson_raises(monkeypatch):
+    monkeypatch.setattr(json_codec, "orjson", None)
+    with pytest.raises(ValueError):
+        json_codec.dumps({}, indent=2, backend="orjson")
+
+
+def test_loads_accepts_bytes_and_reports_stdlib_errors():
+    assert json_codec.loads(b'{"a": [1, 2.5, "\\u00e9"]}') == {"a": [1, 2.5, "é"]}
+    assert json_codec.loads('{"a": NaN}')["a"] != json_codec.loads('{"a": NaN}')["a"]
+    with pytest.raises(json.JSONDecodeError) as exc:
+        json_codec.loads('{"a": 1,\n  "b": }')
+    assert exc.value.lineno == 2
+
+
+def test_string_contents_do_not_force_the_stdlib_fallback(monkeypatch):
+    pytest.importorskip("orjson")
+    calls = []
+    real_dumps = json.dumps
+    monkeypatch.setattr(json_codec.json, "dumps", lambda *a, **kw: calls.append(1) or real_dumps(*a, **kw))
+
+    json_codec.dumps({"color": "#1e1e1e", "size": "1em", "ratio": 1.5}, indent=2, backend="orjson")
+    assert calls == []
+    json_codec.dumps({"opacity": 1e-05}, indent=2, backend="orjson")
+    assert calls == [1]
+
+
+def test_non_finite_floats_round_trip_unchanged():
+    text = json.dumps({"a": float("nan"), "b": [float("inf")]}, indent=2)
+    assert json_codec.dumps(json_codec.loads(text), indent=2) == text
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["123456789012345678901234567890", '{"a": [-9223372036854775809]}', b'{"a": 18446744073709551616}'],
+)
+def test_loads_keeps_integers_wider_than_64_bits_exact(text):
+    assert json_codec.loads(text) == json.loads(text)
+    assert json_codec.dumps(json_codec.loads(text), indent=2) == json.dumps(json.loads(text), indent=2)
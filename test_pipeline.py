@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+
+from shopify_theme_utils.pipeline import Stage, run_pipeline
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def test_pipeline_overlaps_stages():
+    active = {"a": 0, "b": 0}
+    overlap = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def fn(x):
+            with lock:
+                active[name] += 1
+                overlap.append(active["a"] > 0 and active["b"] > 0)
+            time.sleep(0.02)
+            with lock:
+                active[name] -= 1
+            return x + 1
+        return fn
+
+    run = run_pipeline(range(6), [Stage("a", stage("a"), workers=2), Stage("b", stage("b"), workers=2)])
+
+    assert sorted(run["results"]) == [2, 3, 4, 5, 6, 7]
+    assert any(overlap)
+    assert [s["completed"] for s in run["stages"]] == [6, 6]
+    assert run["stages"][0]["items_per_second"] > 0
+
+
+def test_pipeline_drops_failed_items_and_runs_process_stages():
+    def check(x):
+        if x == -2:
+            raise ValueError("negative")
+        return x
+
+    run = run_pipeline([1, -2, 3], [Stage("check", check), Stage("abs", abs, workers=2, kind="process")])
+
+    assert sorted(run["results"]) == [1, 3]
+    assert run["errors"] == [{"item": "-2", "stage": "check", "error": "negative"}]
+    assert run["stages"][0]["failed"] == 1
+
+
+def test_restore_themes_pipeline_pulls_cleans_and_pushes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    themes = [
+        {"id": 1, "name": "Live", "role": "live", "updated_at": "2025-01-03T00:00:00Z"},
+        {"id": 2, "name": "Summer", "role": "unpublished", "updated_at": "2025-01-02T00:00:00Z"},
+        {"id": 3, "name": "Winter", "role": "unpublished", "updated_at": "2025-01-01T00:00:00Z"},
+    ]
+    monkeypatch.setattr(runner, "_theme_list_json", lambda: themes)
+    monkeypatch.setattr(runner, "_get_live_theme_id", lambda: 1)
+
+    def fake_pull(theme_id, theme_dir):
+        (theme_dir / "templates").mkdir(parents=True)
+        (theme_dir / "sections").mkdir()
+        (theme_dir / "sections" / "main.liquid").write_text("", encoding="utf-8")
+        template = {"sections": {"main": {"type": "main", "blocks": {"x": {"type": "shopify://apps/a/b/c"}},
+                                          "block_order": ["x"]}}}
+        (theme_dir / "templates" / "index.json").write_text(json.dumps(template), encoding="utf-8")
+
+    pushed = []
+    monkeypatch.setattr(runner, "_pull_theme_to_dir", fake_pull)
+    monkeypatch.setattr(runner, "_push_dir", lambda d, **kw: pushed.append((d.name, kw)) or {"theme": {}})
+
+    summary = runner.restore_themes_pipeline("dev", cpu_workers=1)
+
+    assert sorted(r["title"] for r in summary["restored"]) == ["Summer", "Winter"]
+    assert all(r["removed_app_blocks"] == 1 for r in summary["restored"])
+    assert sorted(p[0] for p in pushed) == ["Summer", "Winter"]
+    assert all(p[1] == {"store": "dev", "theme": p[0], "unpublished": True} for p in pushed)
+    assert [s["stage"] for s in summary["stages"]] == ["pull", "clean", "push"]
+    assert summary["stages"][1]["kind"] == "thread"
+    assert summary["errors"] == []
+
+
+def test_pipeline_reraises_base_exceptions_without_hanging():
+    def boom(x):
+        if x == 3:
+            raise SystemExit("subprocess wrapper gave up")
+        return x
+
+    done = []
+
+    def run():
+        try:
+            run_pipeline(range(50), [Stage("a", boom, workers=2), Stage("b", lambda x: x)], queue_size=1)
+        except SystemExit as e:
+            done.append(e)
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    t.join(timeout=5)
+
+    assert not t.is_alive()
+    assert [str(e) for e in done] == ["subprocess wrapper gave up"]
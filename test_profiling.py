@@ -0,0 +1,50 @@
+import json
+import threading
+
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def test_profiling_disabled_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+
+    runner.remove_app_blocks()
+
+    assert runner.profile_dir is None
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_profiling_writes_reports_once_per_top_level_operation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test", profile_dir="profiles")
+    (runner.shopify_theme_dir / "templates").mkdir()
+    (runner.shopify_theme_dir / "templates" / "index.json").write_text("{", encoding="utf-8")
+
+    # theme_push calls validate_templates internally; only the outer call is profiled.
+    assert runner.theme_push() is False
+
+    reports = sorted((tmp_path / "profiles").glob("*.json"))
+    assert [p.name.split("-")[0] for p in reports] == ["theme_push"]
+    report = json.loads(reports[0].read_text(encoding="utf-8"))
+    assert report["operation"] == "theme_push"
+    assert report["tracemalloc_peak_bytes"] > 0
+    assert report["peak_rss_increase_bytes"] is None or report["peak_rss_increase_bytes"] >= 0
+    assert report["process_peak_rss_bytes"] is None or report["process_peak_rss_bytes"] > 0
+    assert reports[0].with_suffix(".txt").read_text(encoding="utf-8")
+    assert reports[0].with_suffix(".prof").exists()
+
+
+def test_concurrent_operations_on_one_runner_are_each_profiled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test", profile_dir="profiles")
+    both_running = threading.Barrier(2)
+    monkeypatch.setattr(runner, "_validate_before_push", lambda tree=None: both_running.wait(timeout=5) is not None)
+    monkeypatch.setattr("shopify_theme_utils.theme_command_runner._run_command", lambda command: None)
+
+    threads = [threading.Thread(target=runner.theme_push) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(list((tmp_path / "profiles").glob("theme_push-*.json"))) == 2
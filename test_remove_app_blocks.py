@@ -0,0 +1,120 @@
+import json
+
+from shopify_theme_utils.manifest import MANIFEST_NAME
+from shopify_theme_utils.templates import clean_templates_dir
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+TEMPLATE = {
+    "sections": {
+        "main": {
+            "type": "main-product",
+            "blocks": {
+                "title": {"type": "title"},
+                "reviews": {"type": "shopify://apps/reviews/blocks/stars/abc"},
+            },
+            "block_order": ["title", "reviews"],
+        }
+    },
+    "order": ["main"],
+}
+
+
+def _theme(root, name, with_manifest=True):
+    d = root / name
+    (d / "templates").mkdir(parents=True)
+    raw = "/* generated by Shopify admin */\n" + json.dumps(TEMPLATE)
+    (d / "templates" / "product.json").write_text(raw, encoding="utf-8")
+    if with_manifest:
+        (d / MANIFEST_NAME).write_text(json.dumps({"theme_id": name}), encoding="utf-8")
+    return d
+
+
+def test_clean_templates_dir_removes_app_blocks(tmp_path):
+    d = _theme(tmp_path, "A")
+
+    summary = clean_templates_dir(d)
+
+    data = json.loads((d / "templates" / "product.json").read_text(encoding="utf-8"))
+    assert summary["removed_app_blocks"] == 1
+    assert list(data["sections"]["main"]["blocks"]) == ["title"]
+    assert data["sections"]["main"]["block_order"] == ["title"]
+
+
+def test_clean_templates_dir_dry_run_leaves_files(tmp_path):
+    d = _theme(tmp_path, "A")
+    before = (d / "templates" / "product.json").read_text(encoding="utf-8")
+
+    summary = clean_templates_dir(d, dry_run=True, quiet=True)
+
+    assert summary["changed"] == 1
+    assert (d / "templates" / "product.json").read_text(encoding="utf-8") == before
+
+
+def test_remove_app_blocks_batch_over_manifest_dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    backups = tmp_path / "previous-themes"
+    _theme(backups, "A")
+    _theme(backups, "B")
+    _theme(backups, "untagged", with_manifest=False)
+
+    summary = runner.remove_app_blocks_batch(max_workers=2)
+
+    assert sorted(t["path"] for t in summary["themes"]) == [str(backups / "A"), str(backups / "B")]
+    assert summary["totals"]["removed_app_blocks"] == 2
+    assert summary["errors"] == []
+
+
+def test_remove_app_blocks_batch_single_theme_runs_in_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _theme(tmp_path / "previous-themes", "A")
+
+    def no_processes(*args, **kwargs):
+        raise AssertionError("worker processes should not be started")
+
+    monkeypatch.setattr("shopify_theme_utils.theme_command_runner.ProcessPoolExecutor", no_processes)
+    summary = runner.remove_app_blocks_batch()
+
+    assert summary["totals"]["removed_app_blocks"] == 1
+    assert summary["errors"] == []
+
+
+def test_clean_cache_skips_unchanged_templates(tmp_path, monkeypatch):
+    import shopify_theme_utils.templates as templates
+
+    d = _theme(tmp_path, "A")
+    (d / "templates" / "page.json").write_text(json.dumps({"sections": {}}), encoding="utf-8")
+    clean_templates_dir(d, quiet=True)
+    # Files written during a run carry an mtime newer than that run's start, so
+    # one more run is needed before the stat-only fast path is trusted.
+    clean_templates_dir(d, quiet=True)
+
+    def _no_parse(raw):
+        raise AssertionError("template should not be parsed")
+
+    monkeypatch.setattr(templates, "parse_template_text", _no_parse)
+    summary = clean_templates_dir(d, quiet=True)
+
+    assert summary["scanned"] == 2
+    assert summary["skipped_unchanged"] == 2
+
+
+def test_clean_cache_reparses_modified_templates(tmp_path):
+    d = _theme(tmp_path, "A")
+    clean_templates_dir(d, quiet=True)
+
+    (d / "templates" / "product.json").write_text(json.dumps(TEMPLATE), encoding="utf-8")
+    summary = clean_templates_dir(d, quiet=True)
+
+    assert summary["skipped_unchanged"] == 0
+    assert summary["removed_app_blocks"] == 1
+
+
+def test_clean_cache_invalidated_by_ruleset(tmp_path):
+    d = _theme(tmp_path, "A")
+    clean_templates_dir(d, quiet=True, scrub_missing_metafields=False)
+
+    summary = clean_templates_dir(d, quiet=True, scrub_missing_metafields=True)
+
+    assert summary["skipped_unchanged"] == 0
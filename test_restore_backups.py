@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+
+from shopify_theme_utils.manifest import MANIFEST_NAME
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def _backup(root, name, theme_id, *, store="prod", template=None):
+    d = root / name
+    (d / "templates").mkdir(parents=True)
+    (d / "sections").mkdir()
+    (d / "sections" / "main.liquid").write_text("", encoding="utf-8")
+    template = template or {"sections": {"main": {"type": "main"}}, "order": ["main"]}
+    (d / "templates" / "index.json").write_text(json.dumps(template), encoding="utf-8")
+    manifest = {"theme_id": theme_id, "title": name, "role": "unpublished", "store": store}
+    (d / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    return d
+
+
+def test_restore_backups_pushes_concurrently_new_and_overwrite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    root = tmp_path / "previous-themes"
+    for i in range(6):
+        _backup(root, f"Theme {i}", 100 + i)
+    _backup(root, "Other store", 200, store="staging")
+    (root / "not-a-backup").mkdir()
+
+    live_calls = []
+    monkeypatch.setattr(runner, "_get_live_theme_id", lambda store=None: live_calls.append(store) or 999)
+
+    lock = threading.Lock()
+    active, peak, pushed = [0], [0], []
+
+    def fake_push(theme_dir, **kw):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+            pushed.append((theme_dir.name, kw))
+        return {"theme": {"id": 1}}
+
+    monkeypatch.setattr(runner, "_push_dir", fake_push)
+
+    summary = runner.restore_backups("dev", source_store="prod", id_map={100: 5000}, max_workers=3)
+
+    assert len(summary["restored"]) == 6
+    assert summary["errors"] == [] and summary["skipped_live"] == []
+    assert peak[0] == 3
+    assert live_calls == ["dev"]
+    kw = dict(pushed)
+    assert kw["Theme 0"] == {"store": "dev", "theme": "5000"}
+    assert kw["Theme 1"] == {"store": "dev", "theme": "Theme 1", "unpublished": True}
+    assert "Other store" not in kw
+    assert [r["mode"] for r in summary["restored"]][:2] == ["overwrite", "new"]
+
+
+def test_restore_backups_refuses_live_overwrite_and_invalid_templates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    root = tmp_path / "previous-themes"
+    _backup(root, "Summer", 1)
+    _backup(root, "Winter", 2, template={"sections": {"main": {"type": "missing"}}, "order": ["main"]})
+    _backup(root, "Autumn", 3)
+    monkeypatch.setattr(runner, "_get_live_theme_id", lambda store=None: 777)
+    pushed = []
+    monkeypatch.setattr(runner, "_push_dir", lambda d, **kw: pushed.append(d.name) or {})
+
+    summary = runner.restore_backups(id_map={"1": "#777"}, theme_names=["summer", "winter", "#3"])
+
+    assert [j["title"] for j in summary["skipped_live"]] == ["Summer"]
+    assert [e["title"] for e in summary["errors"]] == ["Winter"]
+    assert pushed == ["Autumn"]
+
+    pushed.clear()
+    summary = runner.restore_backups(id_map={"1": "777"}, theme_names=["Summer"], allow_live=True)
+    assert pushed == ["Summer"] and summary["restored"][0]["target_theme"] == "777"
+
+
+def test_restore_backups_rejects_jobs_sharing_a_target_theme(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    root = tmp_path / "previous-themes"
+    _backup(root, "Summer", 1)
+    _backup(root, "Summer-2", 1)
+    _backup(root, "Winter", 2)
+    _backup(root, "Autumn", 3)
+    _backup(root, "Spring", 4)
+    monkeypatch.setattr(runner, "_get_live_theme_id", lambda store=None: 999)
+    pushed = []
+    monkeypatch.setattr(runner, "_push_dir", lambda d, **kw: pushed.append(d.name) or {})
+
+    summary = runner.restore_backups(id_map={1: 500, 2: 600, 3: 600, 4: 700})
+
+    assert pushed == ["Spring"]
+    assert sorted(e["title"] for e in summary["errors"]) == ["Autumn", "Summer", "Summer-2", "Winter"]
+    assert all("would overwrite theme" in e["error"] for e in summary["errors"])
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timezone
+
+from shopify_theme_utils.manifest import MANIFEST_NAME
+from shopify_theme_utils.retention import delete_backups, plan_retention, scan_backups, trash_size_bytes
+
+
+def _backup(root, name, theme_id, downloaded_at, size=10):
+    d = root / name
+    (d / "templates").mkdir(parents=True)
+    (d / "templates" / "index.json").write_bytes(b"x" * size)
+    manifest = {"theme_id": theme_id, "store": "s", "title": name, "downloaded_at": downloaded_at}
+    (d / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    return d
+
+
+def test_scan_backups_ignores_untagged_and_hidden_dirs(tmp_path):
+    _backup(tmp_path, "A", 1, "2025-01-01T00:00:00+00:00", size=100)
+    (tmp_path / "not-a-backup").mkdir()
+    (tmp_path / ".trash").mkdir()
+
+    backups = scan_backups(tmp_path)
+
+    assert [b["title"] for b in backups] == ["A"]
+    assert backups[0]["size_bytes"] > 100
+
+
+def test_plan_keep_last_per_theme_id():
+    def b(tid, day):
+        return {"path": f"{tid}-{day}", "store": "s", "theme_id": tid, "size_bytes": 1,
+                "downloaded_at": datetime(2025, 1, day, tzinfo=timezone.utc)}
+
+    plan = plan_retention([b(1, 1), b(1, 2), b(1, 3), b(2, 1)], keep_last=2)
+
+    assert sorted(x["path"] for x in plan["delete"]) == ["1-1"]
+    assert {x["reason"] for x in plan["delete"]} == {"keep_last"}
+
+
+def test_plan_age_and_lru_size_budget():
+    now = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+    def b(path, month, size):
+        return {"path": path, "store": "s", "theme_id": path, "size_bytes": size,
+                "downloaded_at": datetime(2025, month, 1, tzinfo=timezone.utc)}
+
+    backups = [b("old", 1, 10), b("mid", 4, 50), b("new", 5, 50), {**b("unknown", 1, 5), "downloaded_at": None}]
+    plan = plan_retention(backups, max_age_days=90, max_total_bytes=60, now=now)
+
+    reasons = {x["path"]: x["reason"] for x in plan["delete"]}
+    assert reasons == {"old": "max_age", "unknown": "max_total_bytes", "mid": "max_total_bytes"}
+    assert [x["path"] for x in plan["keep"]] == ["new"]
+    assert plan["reclaimable_bytes"] == 65
+
+
+def test_delete_backups_moves_out_of_root_immediately(tmp_path):
+    d = _backup(tmp_path, "A", 1, None)
+    keep = _backup(tmp_path, "B", 2, None)
+
+    thread = delete_backups(tmp_path, [d], wait=True)
+
+    assert thread is not None
+    assert not thread.daemon
+    assert not d.exists()
+    assert keep.exists()
+    assert not (tmp_path / ".trash").exists()
+
+
+def test_delete_backups_refuses_paths_outside_root(tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    root = tmp_path / "root"
+    root.mkdir()
+    try:
+        delete_backups(root, [other])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert other.exists()
+
+
+def test_delete_backups_uses_a_trash_batch_per_call(tmp_path):
+    a = _backup(tmp_path, "A", 1, None)
+    b = _backup(tmp_path, "B", 2, None)
+    # A leftover batch from an interrupted run is reported and left alone.
+    leftover = tmp_path / ".trash" / "leftover"
+    leftover.mkdir(parents=True)
+    (leftover / "f").write_bytes(b"x" * 7)
+
+    t1 = delete_backups(tmp_path, [a])
+    t2 = delete_backups(tmp_path, [b])
+    t1.join()
+    t2.join()
+
+    assert not a.exists() and not b.exists()
+    assert [p.name for p in (tmp_path / ".trash").iterdir()] == ["leftover"]
+    assert trash_size_bytes(tmp_path) == 7
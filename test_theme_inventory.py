@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from shopify_theme_utils.manifest import MANIFEST_NAME
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+from shopify_theme_utils.theme_inventory import ThemeInventory
+
+
+def _themes(*rows):
+    return [{"id": i, "name": n, "role": r, "updated_at": u} for i, n, r, u in rows]
+
+
+def test_refresh_store_is_incremental_and_queries_use_it(tmp_path):
+    with ThemeInventory(tmp_path / "inv.sqlite") as inv:
+        counts = inv.refresh_store("a", _themes(
+            (1, "Live", "live", "2025-01-03T00:00:00Z"),
+            (2, "Summer", "unpublished", "2025-01-02T00:00:00Z"),
+            (3, "Winter", "unpublished", "2025-01-01T00:00:00Z"),
+        ))
+        assert counts == {"added": 3, "updated": 0, "unchanged": 0, "removed": 0}
+        inv.refresh_store("b", _themes((7, "summer", "unpublished", "2024-06-01T02:00:00+02:00")))
+
+        counts = inv.refresh_store("a", _themes(
+            (1, "Live", "live", "2025-01-03T00:00:00Z"),
+            (2, "Summer", "unpublished", "2025-02-01T00:00:00Z"),
+        ))
+        assert counts == {"added": 0, "updated": 1, "unchanged": 1, "removed": 1}
+
+        assert inv.stores_with_theme("SUMMER") == ["a", "b"]
+        assert inv.stores_with_theme("Winter") == []
+        oldest = inv.oldest_per_store()
+        assert [(r["store"], r["id"], r["updated_at"]) for r in oldest] == [
+            ("a", "2", "2025-02-01T00:00:00+00:00"),
+            ("b", "7", "2024-06-01T00:00:00+00:00"),
+        ]
+        assert [t["id"] for t in inv.themes("a")] == ["2", "1"]
+        assert [s["store"] for s in inv.stores()] == ["a", "b"]
+
+
+def test_refresh_backups_tracks_manifests(tmp_path):
+    root = tmp_path / "previous-themes"
+    for name, tid in (("Summer", 2), ("Summer-2", 2), ("Winter", 3)):
+        (root / name).mkdir(parents=True)
+        manifest = {"theme_id": tid, "store": "a", "title": name, "downloaded_at": f"2025-01-0{tid}T00:00:00+00:00"}
+        (root / name / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+
+    with ThemeInventory(tmp_path / "inv.sqlite") as inv:
+        inv.refresh_store("a", _themes((2, "Summer", "unpublished", None)))
+        assert inv.refresh_backups(root) == {"updated": 3, "unchanged": 0, "removed": 0}
+        assert inv.refresh_backups(root) == {"updated": 0, "unchanged": 3, "removed": 0}
+
+        (root / "Winter" / MANIFEST_NAME).unlink()
+        assert inv.refresh_backups(root) == {"updated": 0, "unchanged": 2, "removed": 1}
+        assert [b["title"] for b in inv.backups("a", 2)] == ["Summer", "Summer-2"]
+        assert inv.themes("a")[0]["backup_path"] is not None
+
+
+def test_download_previous_themes_can_select_from_inventory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="prod")
+    lists = {
+        "prod": _themes((1, "Live", "live", "2025-01-03T00:00:00Z"), (2, "Summer", "unpublished", "2025-01-02T00:00:00Z")),
+        "dev": _themes((9, "Summer", "unpublished", "2025-01-01T00:00:00Z")),
+    }
+    monkeypatch.setattr(runner, "_theme_list_json", lambda store=None: lists[store or "prod"])
+
+    with pytest.raises(ValueError):
+        runner.download_previous_themes(use_inventory=True)
+
+    summary = runner.refresh_inventory(["prod", "dev"])
+    assert summary["stores"]["prod"]["added"] == 2 and summary["errors"] == []
+
+    def no_cli(*args, **kwargs):
+        raise AssertionError("CLI should not be called")
+
+    monkeypatch.setattr(runner, "_theme_list_json", no_cli)
+    monkeypatch.setattr(runner, "_get_live_theme_id", no_cli)
+    pulled = []
+    monkeypatch.setattr(runner, "_pull_theme_to_dir", lambda tid, d: pulled.append(tid) or d.mkdir(parents=True))
+
+    summary = runner.download_previous_themes(use_inventory=True)
+
+    assert pulled == ["2"]
+    assert summary["downloaded"][0]["title"] == "Summer"
+    with runner.open_inventory() as inv:
+        assert inv.stores_with_theme("summer") == ["dev", "prod"]
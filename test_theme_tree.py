@@ -0,0 +1,127 @@
+import json
+import os
+
+import pytest
+
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+from shopify_theme_utils.theme_tree import ThemeTree
+
+
+def _write(root, rel, text):
+    p = root / rel
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def test_tree_indexes_and_parses_lazily(tmp_path):
+    _write(tmp_path, "templates/index.json", "/* header */\n{\"sections\": {}}")
+    _write(tmp_path, "templates/customers/login.json", "{}")
+    _write(tmp_path, "sections/header.liquid", "")
+
+    tree = ThemeTree(tmp_path)
+
+    assert tree.files("templates", ".json") == ["templates/index.json"]
+    assert tree.files("templates", ".json", recursive=True) == [
+        "templates/customers/login.json",
+        "templates/index.json",
+    ]
+    assert tree.parse_count == 0
+    assert tree.read_json("templates/index.json") is tree.read_json("templates/index.json")
+    assert tree.parse_count == 1
+
+
+def test_tree_flushes_only_dirty_files(tmp_path):
+    a = _write(tmp_path, "templates/a.json", "{\"x\": 1}")
+    b = _write(tmp_path, "templates/b.json", "{\"x\": 1}")
+    stale = _write(tmp_path, "assets/old.json", "{}")
+    tree = ThemeTree(tmp_path)
+
+    tree.read_json("templates/a.json")["x"] = 2
+    tree.mark_dirty("templates/a.json")
+    tree.read_json("templates/b.json")
+    tree.write_text("assets/new.json", "{}")
+    tree.delete("assets/old.json")
+    written = tree.flush()
+
+    assert sorted(written) == ["assets/new.json", "templates/a.json"]
+    assert json.loads(a.read_text(encoding="utf-8")) == {"x": 2}
+    assert b.read_text(encoding="utf-8") == "{\"x\": 1}"
+    assert not stale.exists()
+    assert tree.dirty == []
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_shared_tree_parses_each_template_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    theme = runner.shopify_theme_dir
+    _write(theme, "sections/main.liquid", "")
+    for i in range(3):
+        _write(theme, f"templates/page{i}.json", json.dumps({
+            "sections": {"main": {"type": "main", "blocks": {"app": {"type": "shopify://apps/x/blocks/y/z"}},
+                                  "block_order": ["app"]}},
+        }))
+    calls = []
+    monkeypatch.setattr("shopify_theme_utils.theme_command_runner._run_command", calls.append)
+
+    tree = runner.load_theme_tree()
+    runner.remove_app_blocks(tree=tree, use_cache=False)
+    assert runner.theme_push(tree=tree) is True
+
+    assert tree.parse_count == 3
+    assert len(calls) == 1
+
+
+def test_deleted_files_are_hidden_before_flush(tmp_path):
+    _write(tmp_path, "templates/a.json", "{}")
+    _write(tmp_path, "templates/b.json", "{}")
+    tree = ThemeTree(tmp_path)
+
+    tree.delete("templates/a.json")
+
+    assert not tree.exists("templates/a.json")
+    assert tree.files("templates", ".json") == ["templates/b.json"]
+    tree.write_text("templates/a.json", "{}")
+    assert tree.exists("templates/a.json")
+
+
+def test_failed_replace_keeps_unmoved_files_dirty_and_removes_temp_files(tmp_path, monkeypatch):
+    _write(tmp_path, "templates/a.json", "{}")
+    _write(tmp_path, "templates/b.json", "{}")
+    tree = ThemeTree(tmp_path)
+    tree.write_text("templates/a.json", "{\"a\": 1}")
+    tree.write_text("templates/b.json", "{\"b\": 1}")
+
+    real_replace = os.replace
+
+    def flaky_replace(src, dst):
+        if str(dst).endswith("b.json"):
+            raise OSError("disk full")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", flaky_replace)
+    with pytest.raises(OSError):
+        tree.flush()
+
+    assert tree.dirty == ["templates/b.json"]
+    assert (tmp_path / "templates" / "a.json").read_text(encoding="utf-8") == "{\"a\": 1}"
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_remove_app_blocks_leaves_other_staged_edits_pending(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    theme = runner.shopify_theme_dir
+    _write(theme, "templates/index.json", json.dumps({
+        "sections": {"main": {"type": "main", "blocks": {"app": {"type": "shopify://apps/x/blocks/y/z"}},
+                              "block_order": ["app"]}},
+    }))
+    tree = runner.load_theme_tree()
+    tree.write_text("assets/pending.json", "{}")
+
+    runner.remove_app_blocks(tree=tree, use_cache=False)
+
+    assert json.loads((theme / "templates" / "index.json").read_text(encoding="utf-8"))["sections"]["main"]["blocks"] == {}
+    assert not (theme / "assets" / "pending.json").exists()
+    assert tree.dirty == ["assets/pending.json"]
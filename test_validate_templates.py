@@ -0,0 +1,119 @@
+import json
+
+from shopify_theme_utils.templates import validate_template, validate_templates_dir
+from shopify_theme_utils.theme_command_runner import ThemeCommandRunner
+
+
+def _theme(root):
+    (root / "sections").mkdir(parents=True)
+    (root / "sections" / "main-product.liquid").write_text("", encoding="utf-8")
+    (root / "templates" / "customers").mkdir(parents=True)
+    return root
+
+
+def test_validate_template_reports_block_order_mismatches():
+    data = {
+        "sections": {
+            "main": {
+                "type": "main-product",
+                "blocks": {"a": {"type": "title"}, "b": {"type": "price"}},
+                "block_order": ["a", "missing"],
+            }
+        },
+        "order": ["main", "ghost"],
+    }
+
+    problems = validate_template(data, {"main-product"})
+
+    assert "order references missing section 'ghost'" in problems
+    assert "section 'main': block_order references missing block 'missing'" in problems
+    assert "section 'main': block 'b' is not listed in block_order" in problems
+    assert len(problems) == 3
+
+
+def test_validate_template_allows_static_blocks_outside_block_order():
+    data = {
+        "sections": {
+            "main": {
+                "type": "main-product",
+                "blocks": {
+                    "title": {"type": "_product-title", "static": True},
+                    "group": {
+                        "type": "group",
+                        "blocks": {"media": {"type": "_media", "static": True}, "text": {"type": "text"}},
+                        "block_order": [],
+                    },
+                },
+                "block_order": ["group"],
+            }
+        },
+        "order": ["main"],
+    }
+
+    assert validate_template(data, {"main-product"}) == [
+        "section 'main' > block 'group': block 'text' is not listed in block_order"
+    ]
+
+
+def test_validate_templates_dir_reports_json_and_section_type_errors(tmp_path):
+    theme = _theme(tmp_path)
+    (theme / "templates" / "product.json").write_text(
+        json.dumps({"sections": {"main": {"type": "main-product"}, "x": {"type": "nope"}}}), encoding="utf-8"
+    )
+    (theme / "templates" / "customers" / "account.json").write_text(
+        "/* header\n comment */\n{\n  \"sections\": {,\n}", encoding="utf-8"
+    )
+
+    summary = validate_templates_dir(theme)
+
+    assert summary["checked"] == 2
+    by_path = {e["path"]: e["message"] for e in summary["errors"]}
+    assert by_path["templates/product.json"] == "section 'x': type 'nope' has no sections/nope.liquid"
+    assert by_path["templates/customers/account.json"].startswith("invalid JSON:")
+    assert "line 4" in by_path["templates/customers/account.json"]
+
+
+def test_theme_push_refuses_invalid_templates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _theme(runner.shopify_theme_dir)
+    (runner.shopify_theme_dir / "templates" / "index.json").write_text("{", encoding="utf-8")
+    calls = []
+    monkeypatch.setattr("shopify_theme_utils.theme_command_runner._run_command", calls.append)
+
+    assert runner.theme_push() is False
+    assert calls == []
+    assert runner.theme_push(validate=False) is True
+    assert len(calls) == 1
+
+
+def test_theme_push_flushes_pending_tree_edits_before_validating(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _theme(runner.shopify_theme_dir)
+    index = runner.shopify_theme_dir / "templates" / "index.json"
+    index.write_text("{", encoding="utf-8")
+    calls = []
+    monkeypatch.setattr("shopify_theme_utils.theme_command_runner._run_command", calls.append)
+
+    tree = runner.load_theme_tree()
+    tree.set_json("templates/index.json", {"sections": {"main": {"type": "main-product"}}, "order": ["main"]})
+
+    assert runner.theme_push(tree=tree) is True
+    assert tree.dirty == []
+    assert json.loads(index.read_text(encoding="utf-8"))["order"] == ["main"]
+    assert len(calls) == 1
+
+
+def test_theme_push_overwrite_rejects_invalid_templates_before_listing_themes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = ThemeCommandRunner(store_shortname="test")
+    _theme(runner.shopify_theme_dir)
+    (runner.shopify_theme_dir / "templates" / "index.json").write_text("{", encoding="utf-8")
+
+    def no_cli():
+        raise AssertionError("theme list should not be called")
+
+    monkeypatch.setattr(runner, "_get_live_theme_id", no_cli)
+
+    assert runner.theme_push_overwrite(123) is False